@@ -13,23 +13,32 @@ bl_info = {
     "category": "Material",
 }
 
-import bpy, os, sqlite3, tempfile, shutil, traceback, bmesh, uuid, re, time, hashlib, math, json, subprocess, sys
+import bpy, os, sqlite3, tempfile, shutil, traceback, bmesh, uuid, re, time, hashlib, math, json, subprocess, sys, functools, stat, secrets, struct, signal
 from bpy.types import Operator, Panel, UIList, PropertyGroup
 from bpy.props import StringProperty, CollectionProperty, IntProperty, BoolProperty, EnumProperty
 from bpy.app.handlers import persistent
 import bpy.utils.previews
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from queue import Queue, PriorityQueue, Empty # Keep PriorityQueue for now, even if thumbnail_queue is removed
 import threading  # <-- THE CRITICAL FIX IS HERE 
 from threading import Thread, Event, Lock
 from datetime import datetime
-from collections import deque
+from collections import deque, Counter, OrderedDict, defaultdict
+import numpy as np # Bundled with Blender
 
 try:
     import psutil
 except ImportError:
     psutil = None # Define psutil as None if the import fails
 
+try:
+    import orjson # Optional: faster parsing of worker result lines
+    _json_loads = orjson.loads # orjson.JSONDecodeError subclasses json.JSONDecodeError
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
 # --------------------------
 # Helper function to get user-specific data directory
 # --------------------------
@@ -91,8 +100,8 @@ DATABASE_FILE = None
 THUMBNAIL_FOLDER = None
 ICON_TEMPLATE_FILE = None
 _SUFFIX_REGEX_MAT_PARSE = re.compile(r"^(.*?)(\.(\d+))?$")
-_THUMBNAIL_PRELOAD_PATTERN = re.compile(r"^[a-f0-9]{32}\.png$", re.IGNORECASE)
 _ICON_TEMPLATE_VALIDATED = False
+_icon_template_unavailable = False # Set when a template (re)build failed; reset at the start of each collector run
 _LEGACY_THUMBNAIL_PATTERN = re.compile(r"^[a-zA-Z0-9_-]+_([a-f0-9]{32})\.png$", re.IGNORECASE) # ADD THIS LINE
 g_thumbnails_loaded_in_current_UMT_run = False # Add this new global
 g_matlist_transient_tasks_for_post_save = []
@@ -104,7 +113,7 @@ g_materials_are_dirty = False
 g_material_processing_timer_active = False
 materials_modified = False
 g_thumbnails_generated_in_current_run = 0
-g_worker_manager_pool = []
+g_worker_manager_pool = {} # manager.id -> PersistentWorkerManager; exit callbacks pop their own entry
 g_worker_results_queue = Queue()
 g_outstanding_task_count = 0
 thumbnail_task_queue = Queue()
@@ -117,15 +126,27 @@ CPU_USAGE_THRESHOLD_PERCENT = 90.0
 THUMBNAIL_SIZE = 128
 VISIBLE_ITEMS = 30
 THUMBNAIL_MAX_RETRIES = 2
+_DEBUG = bool(os.environ.get("MATLIST_DEBUG")) # Verbose console tracing (set MATLIST_DEBUG=1); f-strings behind it are not even built when off
+DEBUG_VERIFY_TEMPLATE = _DEBUG # Re-open the freshly written icon template to list its scenes (extra full .blend read)
 persistent_icon_template_scene = None
 material_names = {}
+_material_names_dirty = False # Set by schedule_material_names_save, cleared by _flush_material_names
+_material_names_pending_uuids = set() # Rows the pending flush must write; None means the whole table
 material_hashes = {}
 custom_icons = None
+_loaded_icon_lru = OrderedDict() # Hashes loaded into custom_icons, least recently drawn first
+MAX_LOADED_ICONS = 2048 # Previews kept in memory; older ones are dropped and reloaded from disk on demand
+_known_good_icons: set[str] = set() # Hashes whose loaded preview already passed the icon_size check
+_thumb_mtime_cache = {} # hash -> st_mtime_ns of the thumbnail file its loaded preview was read from
 global_hash_cache = {}
-thumbnail_generation_scheduled = {}
+_icon_hash_cache = {} # (name_full, pointer) -> hash for get_custom_icon; entries dropped when the depsgraph reports the material updated
 library_update_queue = []
 is_update_processing = False
 material_list_cache = [] # Used by UIList filter_items
+_uuid_mat_cache = {} # uuid prop -> datablock name, fallback index for get_material_by_uuid
+_uuid_mat_cache_gen = -1 # len(bpy.data.materials) when _uuid_mat_cache was built
+_last_populate_uuid_to_index = {} # uuid -> row in scene.material_list_items, filled while the list is built
+_list_original_name_counts = Counter() # original_name -> rows using it, for the panel's duplicate-name warning
 list_version = 0
 library_lock = Lock()
 changed_materials = set() # This seems unused, consider removing
@@ -133,6 +154,7 @@ material_uuid_map = {} # This seems unused, consider removing
 hash_lock = Lock() # Used by save_material_names, save_material_hashes, delayed_load_post
 thumbnail_workers = [] # Used by register/unregister for thread management
 db_connections = Queue(maxsize=5)
+_HAS_USAGE_TABLE = None # blend_material_usage exists? None = not checked yet; set by initialize_database
 _display_name_cache = {}
 _display_name_cache_version = 0
 materials_modified = False # Used by depsgraph_handler and save_handler
@@ -220,6 +242,12 @@ def initialize_database():
                   source_material_name_in_file TEXT, 
                   source_material_uuid_in_file TEXT,
                   timestamp_added_to_library INTEGER)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS library_hash_cache
+                 (library_file TEXT PRIMARY KEY,
+                  mtime REAL,
+                  size INTEGER,
+                  hash_version TEXT,
+                  hashes JSON)''')
 
     c.execute("SELECT COUNT(*) FROM cache_version")
     if c.fetchone()[0] == 0:
@@ -229,6 +257,8 @@ def initialize_database():
 
     conn.commit()
     conn.close()
+    global _HAS_USAGE_TABLE
+    _HAS_USAGE_TABLE = True # Created above
     print("[DB Init] Database initialized/verified (Timestamp table removed, Index table ensured).", flush=True)
 
 # --------------------------
@@ -242,6 +272,19 @@ def get_db_connection():
     finally:
         db_connections.put(conn)
 
+def has_usage_table():
+    """
+    Whether blend_material_usage exists; sqlite_master is queried at most once per session.
+    DB errors (locked, corrupt, ...) propagate uncached so callers can report them as such.
+    """
+    global _HAS_USAGE_TABLE
+    if _HAS_USAGE_TABLE is None:
+        with get_db_connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='blend_material_usage'")
+            _HAS_USAGE_TABLE = c.fetchone() is not None
+    return _HAS_USAGE_TABLE
+
 # --------------------------
 # Helper Functions: Names & Hashing
 # --------------------------
@@ -265,13 +308,17 @@ def load_material_names():
         traceback.print_exc()
         material_names = {}
 
-def save_material_names():
+def save_material_names(uuids=None):
+    """Writes material_names to the DB. With `uuids`, only those rows are written (INSERT OR REPLACE)."""
     global material_names
     BATCH_SIZE = 500
     try:
         with get_db_connection() as conn, hash_lock: # hash_lock protects material_names dict
             c = conn.cursor()
-            entries = list(material_names.items())
+            if uuids is None:
+                entries = list(material_names.items())
+            else:
+                entries = [(u, material_names[u]) for u in uuids if u in material_names]
             for i in range(0, len(entries), BATCH_SIZE):
                 batch = entries[i:i+BATCH_SIZE]
                 c.executemany(
@@ -283,6 +330,37 @@ def save_material_names():
         print(f"[MaterialList] Error saving material names: {e}")
         traceback.print_exc()
 
+def _flush_material_names():
+    """Timer callback: writes material_names once per coalesced batch of edits."""
+    global _material_names_dirty, _material_names_pending_uuids
+    if _material_names_dirty:
+        pending_uuids = _material_names_pending_uuids
+        _material_names_dirty = False
+        _material_names_pending_uuids = set()
+        save_material_names(pending_uuids)
+    return None # One-shot timer
+
+def schedule_material_names_save(uuids=None, delay=2.0):
+    """
+    Marks material_names dirty and defers the DB write, so rapid renames cost one write.
+    Pass the changed `uuids` to have the flush write just those rows; None rewrites all.
+    """
+    global _material_names_dirty, _material_names_pending_uuids
+    if uuids is None:
+        _material_names_pending_uuids = None
+    elif _material_names_pending_uuids is not None:
+        _material_names_pending_uuids.update(uuids)
+    _material_names_dirty = True
+    if not bpy.app.timers.is_registered(_flush_material_names):
+        bpy.app.timers.register(_flush_material_names, first_interval=delay)
+
+def flush_material_names_now():
+    """Writes any pending material_names changes immediately (save, file load, unregister)."""
+    if bpy.app.timers.is_registered(_flush_material_names):
+        try: bpy.app.timers.unregister(_flush_material_names)
+        except Exception: pass
+    _flush_material_names()
+
 def load_material_hashes():
     global material_hashes
     try:
@@ -482,7 +560,7 @@ def _hash_image(img, image_hash_cache):
 
     if calculated_digest is None and hasattr(img, 'filepath_raw') and img.filepath_raw:
         try:
-            resolved_abs_path = bpy.path.abspath(img.filepath_raw)
+            resolved_abs_path = bpy.path.abspath(img.filepath_raw, library=img.library) # '//' is relative to the owning .blend
             if os.path.isfile(resolved_abs_path):
                 with open(resolved_abs_path, "rb") as f:
                     data_from_file = f.read(131072)
@@ -491,7 +569,7 @@ def _hash_image(img, image_hash_cache):
             print(f"[_hash_image Warning] Hash failed on file '{img.filepath_raw}': {e_file}", file=sys.stderr)
 
     if calculated_digest is None:
-        fallback_data = f"FALLBACK|{getattr(img, 'name_full', 'N/A')}|{getattr(img, 'source', 'N/A')}"
+        fallback_data = f"FALLBACK|{getattr(img, 'name', 'N/A')}|{getattr(img, 'source', 'N/A')}" # name, not name_full: same digest linked or appended
         calculated_digest = hashlib.md5(fallback_data.encode('utf-8')).hexdigest()
 
     if image_hash_cache is not None:
@@ -499,14 +577,58 @@ def _hash_image(img, image_hash_cache):
 
     return calculated_digest
 
+IMAGE_PREFETCH_MIN_FILES = 8 # Below this a thread pool costs more than it saves
+
+def _read_file_head_digest(path):
+    """md5 of the first 128 KiB of `path` (same bytes _hash_image reads); None on any error."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.md5(f.read(131072)).hexdigest()
+    except Exception:
+        return None
+
+def prefetch_image_hashes(images, image_hash_cache):
+    """
+    Fills `image_hash_cache` for file-backed images using a thread pool, so _hash_image later
+    finds them cached instead of reading each file serially. Paths are resolved here on the
+    main thread; workers only do file I/O and md5 (both release the GIL). Packed images are left
+    to _hash_image, as their bytes can only be read through bpy.
+    """
+    path_by_key = {}
+    for img in images:
+        key = img.name_full
+        if key in image_hash_cache or not img.filepath_raw:
+            continue
+        if img.packed_file and img.packed_file.data:
+            continue
+        resolved_abs_path = bpy.path.abspath(img.filepath_raw, library=img.library)
+        if os.path.isfile(resolved_abs_path):
+            path_by_key[key] = resolved_abs_path
+    if len(path_by_key) < IMAGE_PREFETCH_MIN_FILES:
+        return 0
+    keys = list(path_by_key)
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+        digests = list(executor.map(_read_file_head_digest, (path_by_key[k] for k in keys)))
+    prefetched = 0
+    for key, digest in zip(keys, digests):
+        if digest: # Failures fall through to _hash_image's own handling
+            image_hash_cache[key] = digest; prefetched += 1
+    return prefetched
+
 # find_principled_bsdf (Kept from your __init__.py)
 def find_principled_bsdf(mat):
     if not mat or not mat.use_nodes or not mat.node_tree:
         return None
     try:
-        output_node = next((n for n in mat.node_tree.nodes if n.bl_idname == 'ShaderNodeOutputMaterial' and n.is_active_output), None)
-        if not output_node:
-            output_node = next((n for n in mat.node_tree.nodes if n.bl_idname == 'ShaderNodeOutputMaterial'), None)
+        # One pass over the nodes: prefer the active output, else the first output seen
+        output_node = None
+        for n in mat.node_tree.nodes:
+            if n.bl_idname == 'ShaderNodeOutputMaterial':
+                if n.is_active_output:
+                    output_node = n
+                    break
+                if output_node is None:
+                    output_node = n
         if not output_node: return None
 
         surface_input = output_node.inputs.get('Surface')
@@ -543,6 +665,97 @@ def find_principled_bsdf(mat):
 
 # get_material_hash (Structure from __init__.py, using updated helpers)
       
+MATERIAL_HASH_VERSION = "v_STRUCTURAL_ROBUST_TRAVERSAL_2" # Also stamps library_hash_cache rows
+
+def _library_file_stamp(path):
+    """(mtime, size) of a file, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+        return st.st_mtime, st.st_size
+    except OSError:
+        return None
+
+def load_main_lib_hash_cache():
+    """
+    Returns {library material name: content hash} for LIBRARY_FILE if the stored copy was
+    computed from the file as it is now (same mtime, size and hash version), else None.
+    """
+    stamp = _library_file_stamp(LIBRARY_FILE)
+    if stamp is None:
+        return None
+    try:
+        with get_db_connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT mtime, size, hash_version, hashes FROM library_hash_cache WHERE library_file = ?",
+                      (os.path.normcase(os.path.abspath(LIBRARY_FILE)),))
+            row = c.fetchone()
+    except Exception as e:
+        print(f"[MaterialList] Error reading library hash cache: {e}")
+        return None
+    if not row or (row[0], row[1]) != stamp or row[2] != MATERIAL_HASH_VERSION:
+        return None
+    try:
+        return json.loads(row[3]) if row[3] else {}
+    except ValueError:
+        return None
+
+def save_main_lib_hash_cache(name_to_hash):
+    """Stores the content hashes of LIBRARY_FILE's materials, stamped with the file's current mtime/size."""
+    stamp = _library_file_stamp(LIBRARY_FILE)
+    if stamp is None:
+        return
+    try:
+        with get_db_connection() as conn:
+            c = conn.cursor()
+            c.execute("INSERT OR REPLACE INTO library_hash_cache (library_file, mtime, size, hash_version, hashes) VALUES (?, ?, ?, ?, ?)",
+                      (os.path.normcase(os.path.abspath(LIBRARY_FILE)), stamp[0], stamp[1], MATERIAL_HASH_VERSION, json.dumps(name_to_hash)))
+            conn.commit()
+    except Exception as e:
+        print(f"[MaterialList] Error saving library hash cache: {e}")
+
+def _library_by_path(filepath):
+    """The bpy.data.libraries entry for `filepath`, or None if the file is not linked."""
+    path_norm = os.path.normcase(os.path.abspath(filepath))
+    return next((lib for lib in bpy.data.libraries
+                 if os.path.normcase(os.path.abspath(bpy.path.abspath(lib.filepath))) == path_norm), None)
+
+def _link_library_materials(filepath):
+    """
+    Links (not appends) every material in `filepath` so it can be inspected read-only.
+    Returns (linked materials, link state); pass the state to _release_library_links when done.
+    """
+    lib_before = _library_by_path(filepath)
+    names_before = _linked_id_names(lib_before) if lib_before else None
+    with bpy.data.libraries.load(filepath, link=True) as (data_from, data_to):
+        data_to.materials = list(data_from.materials)
+    linked_mats = [m for m in data_to.materials if m is not None]
+    return linked_mats, (filepath, names_before)
+
+# ID types a linked material can pull in along with itself
+_LINKED_MATERIAL_ID_COLLECTIONS = ("materials", "node_groups", "textures", "images")
+
+def _linked_id_names(lib):
+    """{bpy.data collection name: names of the IDs in it currently linked from `lib`}."""
+    return {coll: {id_block.name for id_block in getattr(bpy.data, coll) if id_block.library == lib}
+            for coll in _LINKED_MATERIAL_ID_COLLECTIONS}
+
+def _release_library_links(link_state):
+    """Undoes _link_library_materials without touching links that existed before it ran."""
+    filepath, names_before = link_state
+    lib = _library_by_path(filepath)
+    if lib is None:
+        return
+    if names_before is None:
+        bpy.data.libraries.remove(lib) # Drops every ID linked from it in one go
+        return
+    # Already linked before: unlink exactly what this pass added, including the images and
+    # node groups the temporary materials pulled in, not just the materials themselves
+    to_unlink = [id_block for coll in _LINKED_MATERIAL_ID_COLLECTIONS for id_block in getattr(bpy.data, coll)
+                 if id_block.library == lib and id_block.name not in names_before[coll]]
+    if to_unlink:
+        try: bpy.data.batch_remove(ids=to_unlink) # One ID-remap pass for the whole set
+        except Exception as e: print(f"[MaterialList] Warning: could not unlink {len(to_unlink)} temporary datablocks: {e}")
+
 def get_material_hash(mat, force=True, image_hash_cache=None):
     """
     [PRODUCTION VERSION] Calculates a highly detailed, content-based structural hash for a material.
@@ -552,7 +765,7 @@ def get_material_hash(mat, force=True, image_hash_cache=None):
     """
     # Incrementing the version ensures that any materials hashed with older,
     # incorrect logic will be re-hashed and their thumbnails updated correctly.
-    HASH_VERSION = "v_STRUCTURAL_ROBUST_TRAVERSAL_2"
+    HASH_VERSION = MATERIAL_HASH_VERSION
 
     if not mat:
         return None
@@ -833,66 +1046,16 @@ def process_dirty_materials_timer():
     
     return 2.0
 
-def preload_existing_thumbnails():
-    global custom_icons, THUMBNAIL_FOLDER # Ensure THUMBNAIL_FOLDER is accessible
-    # _THUMBNAIL_PRELOAD_PATTERN is now a global, no need to define 'pattern' locally
-
-    print("[Thumb Preload] Starting thumbnail preload process...")
-
-    if custom_icons is None:
-        print("[Thumb Preload] Error: custom_icons collection is None. Attempting to reinitialize.")
-        try:
-            custom_icons = bpy.utils.previews.new()
-            if custom_icons is None:
-                print("[Thumb Preload] CRITICAL: Reinitialization of custom_icons failed. Cannot preload.")
-                return
-            print("[Thumb Preload] Reinitialized custom_icons successfully.")
-        except Exception as e_reinit_preview:
-            print(f"[Thumb Preload] CRITICAL: Error reinitializing custom_icons: {e_reinit_preview}")
-            return
-
-    if not os.path.isdir(THUMBNAIL_FOLDER):
-        print(f"[Thumb Preload] Thumbnail directory not found: {THUMBNAIL_FOLDER}")
-        try:
-            os.makedirs(THUMBNAIL_FOLDER, exist_ok=True)
-            print(f"[Thumb Preload] Created thumbnail directory: {THUMBNAIL_FOLDER}")
-        except Exception as e_mkdir:
-            print(f"[Thumb Preload] Error creating thumbnail directory {THUMBNAIL_FOLDER}: {e_mkdir}")
-            return
-
-    # Local 'pattern' variable is removed as we use the global _THUMBNAIL_PRELOAD_PATTERN
-    loaded_count = 0; skipped_count = 0; error_count = 0
-
-    print(f"[Thumb Preload] Scanning directory: {THUMBNAIL_FOLDER}")
-    try:
-        for filename in os.listdir(THUMBNAIL_FOLDER):
-            # Use the pre-compiled global pattern here
-            if _THUMBNAIL_PRELOAD_PATTERN.match(filename): # MODIFIED LINE
-                filepath = os.path.join(THUMBNAIL_FOLDER, filename)
-                icon_hash_key = filename[:-4].lower()
-
-                if icon_hash_key in custom_icons:
-                    skipped_count += 1
-                    continue
-                try:
-                    if custom_icons is None: # Should not happen if re-init worked
-                        print(f"[Thumb Preload] Error: custom_icons became None during loop for {filename}.")
-                        error_count += 1; continue
-
-                    custom_icons.load(icon_hash_key, filepath, 'IMAGE')
-                    if icon_hash_key in custom_icons:
-                        loaded_count += 1
-                    else:
-                        print(f"[Thumb Preload] *** FAILURE ***: Load called for '{filename}', key '{icon_hash_key}' NOT in cache after!")
-                        error_count += 1
-                except Exception as e:
-                    print(f"[Thumb Preload] *** ERROR *** loading {filename}: {str(e)}")
-                    error_count += 1
-    except Exception as e_scan:
-        print(f"[Thumb Preload] Error scanning directory: {e_scan}")
-        traceback.print_exc()
-
-    print(f"[Thumb Preload] Preload finished. Loaded: {loaded_count}, Skipped(Already Existed): {skipped_count}, Errors: {error_count}")
+def _touch_loaded_icon(hash_value):
+    """Marks a preview as just used and evicts the least recently used ones beyond MAX_LOADED_ICONS."""
+    _loaded_icon_lru[hash_value] = None
+    _loaded_icon_lru.move_to_end(hash_value)
+    while len(_loaded_icon_lru) > MAX_LOADED_ICONS:
+        old_hash, _ = _loaded_icon_lru.popitem(last=False)
+        _known_good_icons.discard(old_hash)
+        _thumb_mtime_cache.pop(old_hash, None)
+        if custom_icons is not None and old_hash in custom_icons:
+            del custom_icons[old_hash]
 
 def _convert_to_json_serializable(data):
     if isinstance(data, (bpy.types.bpy_prop_array, tuple)):
@@ -1023,6 +1186,7 @@ def delete_cleared_library_materials(): # Unchanged
 # --------------------------
 reference_backup = {}
 editing_backup = {}
+_pending_editing_switch_scene = None # Scene name _switch_to_editing_mode will switch; one timer serves any number of detections
 def get_backup_filepath(): return bpy.data.filepath if bpy.data.filepath else ""
 def save_backups(): # Unchanged
     backup_file = get_backup_filepath()
@@ -1064,11 +1228,17 @@ def backup_current_assignments(backup_dict, backup_type='editing'): # Unchanged
 def restore_backup(backup_dict, clear_backup=False): # Unchanged
     scene = get_first_scene()
     if scene:
+        mats_by_name = None # Built on first use, then shared by every object's slots
         for obj in scene.objects:
             if obj.type == 'MESH' and obj.name in backup_dict:
+                if mats_by_name is None:
+                    # Local materials win over linked namesakes, as bpy.data.materials.get(name) did
+                    mats_by_name = {m.name: m for m in bpy.data.materials if m.library is None}
+                    for m in bpy.data.materials:
+                        if m.library is not None: mats_by_name.setdefault(m.name, m)
                 original_slots = backup_dict[obj.name]; obj.data.materials.clear()
                 for mat_name in original_slots:
-                    if mat_name: mat = bpy.data.materials.get(mat_name)
+                    if mat_name: mat = mats_by_name.get(mat_name)
                     else: mat = None
                     obj.data.materials.append(mat) # Appends None if mat is None
     if clear_backup and backup_dict is editing_backup: editing_backup.clear()
@@ -1123,13 +1293,10 @@ def load_material_group_cache(): # Unchanged
     try:
         with get_db_connection() as conn:
             c = conn.cursor()
-            c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='cache_version'")
-            if c.fetchone() is None: return 0, {}
+            # cache_version and groups are created by initialize_database; no sqlite_master probes needed
             c.execute("SELECT version FROM cache_version LIMIT 1")
             version_row = c.fetchone() # Fetch the row first
             version = version_row[0] if version_row else 0 # Then access element
-            c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='groups'")
-            if c.fetchone() is None: return version, {}
             c.execute("SELECT hash, local_uuid, library_uuid FROM groups")
             return version, {row[0]: {"local": row[1], "library": row[2]} for row in c.fetchall()}
     except Exception as e: print(f"[GroupCache] Error loading cache: {e}"); return 0, {}
@@ -1147,6 +1314,8 @@ def save_material_group_cache(version, groups): # Unchanged
             c.execute("INSERT OR REPLACE INTO cache_version (rowid, version) VALUES (1, ?)", (version,)) # Use rowid
             conn.commit()
     except Exception as e: print(f"[GroupCache] Error saving cache: {e}")
+    finally:
+        _query_library_uuid_for_hash.cache_clear() # groups rows replaced (or possibly partly written)
 
 @persistent
 def initialize_material_properties():
@@ -1158,12 +1327,16 @@ def initialize_material_properties():
     - If a local material's datablock name is a UUID, its display name defaults to "Material".
     - Otherwise, the display name is based on the material's original datablock name.
     - Uses get_unique_display_name to handle naming.
+
+    Returns True if any UUID, display name, datablock name or fake-user flag was changed.
     """
     global _display_name_cache, material_names
     
     print("[InitProps] Running initialize_material_properties (v3 - with 'mat_' skip logic)")
     
     local_needs_name_db_save_init = False 
+    named_uuids_init = []
+    datablocks_modified = False
     
     if not material_names: 
         load_material_names()
@@ -1181,7 +1354,10 @@ def initialize_material_properties():
         # --- END OF FIX ---
 
         original_datablock_name = mat.name  
+        uuid_before = mat.get("uuid")
         final_uuid_for_mat = validate_material_uuid(mat, is_copy=False)
+        if final_uuid_for_mat and final_uuid_for_mat != uuid_before:
+            datablocks_modified = True
 
         if not final_uuid_for_mat:
             continue
@@ -1205,6 +1381,7 @@ def initialize_material_properties():
             unique_display_name_for_db = get_unique_display_name(display_name_basis)
             
             material_names[final_uuid_for_mat] = unique_display_name_for_db
+            named_uuids_init.append(final_uuid_for_mat)
             local_needs_name_db_save_init = True
 
         # Ensure local, non-"mat_" materials are named by their UUID and have fake user set.
@@ -1214,20 +1391,23 @@ def initialize_material_properties():
                     existing_mat_with_target_name = bpy.data.materials.get(final_uuid_for_mat)
                     if not existing_mat_with_target_name or existing_mat_with_target_name == mat:
                         mat.name = final_uuid_for_mat
+                        datablocks_modified = True
                 except Exception:
                     pass
             if not mat.use_fake_user:
                 try:
                     mat.use_fake_user = True
+                    datablocks_modified = True
                 except Exception:
                     pass
 
     if local_needs_name_db_save_init:
         print("[InitProps] Saving newly added/updated display names to database...")
-        save_material_names()
+        save_material_names(named_uuids_init)
         _display_name_cache.clear()
 
     print("[InitProps] initialize_material_properties finished.")
+    return local_needs_name_db_save_init or datablocks_modified
 
 def is_valid_uuid_format(uuid_string):
     """
@@ -1541,30 +1721,43 @@ def get_material_by_uuid(uuid_str: str): # Unchanged
     # else:
         # print(f"[DEBUG get_material_by_uuid]     NOT found by direct name lookup.")
 
-    # Fallback: Iterate all materials to check the "uuid" custom property
-    # print(f"[DEBUG get_material_by_uuid]   Fallback: Iterating all materials to check 'uuid' custom property for '{uuid_str}'...")
-    for m_iter in bpy.data.materials:
+    # Fallback: materials whose datablock name is not their UUID (e.g. linked '.001' twins).
+    # Served from a uuid -> datablock name index built by one sweep and reused until the
+    # material count changes. Names, not Material references, are cached so nothing
+    # dangles across undo; every hit is re-verified against the live "uuid" prop.
+    global _uuid_mat_cache_gen
+    materials = bpy.data.materials
+    if _uuid_mat_cache_gen != len(materials):
+        _uuid_mat_cache.clear()
+        _uuid_mat_cache_gen = len(materials)
+
+    cached_name = _uuid_mat_cache.get(uuid_str)
+    if cached_name is not None:
+        cached_mat = materials.get(cached_name)
         try:
-            # mat_name_iter = getattr(m_iter, 'name', 'Unknown/Invalid Material')
-            # is_lib_iter = m_iter.library is not None if hasattr(m_iter, 'library') else 'N/A (no library attr)'
-            uuid_prop_iter = m_iter.get("uuid", "N/A")
-
-            # print(f"[DEBUG get_material_by_uuid]     Checking material: '{mat_name_iter}'. Is Library: {is_lib_iter}. Has UUID Prop: '{uuid_prop_iter}'.") # Can be very verbose
+            if cached_mat is not None and cached_mat.get("uuid") == uuid_str:
+                return cached_mat
+        except ReferenceError:
+            pass
 
-            if uuid_prop_iter == uuid_str:
-                #print(f"[DEBUG get_material_by_uuid]       MATCH found by custom property 'uuid'=='{uuid_str}' on material: '{mat_name_iter}'. Is Library: {is_lib_iter}.")
-                #print(f"[DEBUG get_material_by_uuid]   RETURNING material found by custom property: '{mat_name_iter}'")
-                return m_iter
+    # Miss or stale entry: one sweep, indexing every UUID seen (first match wins, as before)
+    _uuid_mat_cache.clear()
+    found = None
+    for m_iter in materials:
+        try:
+            uuid_prop_iter = m_iter.get("uuid")
+            if not uuid_prop_iter or uuid_prop_iter in _uuid_mat_cache:
+                continue
+            _uuid_mat_cache[uuid_prop_iter] = m_iter.name
+            if found is None and uuid_prop_iter == uuid_str:
+                found = m_iter
         except ReferenceError:
-            #print(f"[DEBUG get_material_by_uuid]     ReferenceError while checking a material, skipping.")
             continue
-        except Exception as e_iter:
-            # mat_name_for_err_log = getattr(m_iter, 'name', 'Unknown/Invalid Material during error')
-            # print(f"[DEBUG get_material_by_uuid]     Exception while checking material '{mat_name_for_err_log}': {e_iter}")
+        except Exception:
             continue
 
     # print(f"[DEBUG get_material_by_uuid]   Material with UUID '{uuid_str}' NOT FOUND after all checks. Returning None.") # Keep final failure log
-    return None
+    return found
 
 def set_active_index_to_top(context):
     """
@@ -1641,10 +1834,93 @@ def _parse_material_suffix(name: str) -> tuple[str, int]:
 
 # --------------------------
 # MATERIAL LIST ITEM CLASS
-def populate_material_list(scene, *, called_from_finalize_run=False):
+def _build_material_list_rows(scene):
+    """
+    The rows populate_material_list writes, in list order: one de-duplicated dict per
+    material concept, sorted alphabetically or by recency per the scene setting.
+    """
+    all_mats_data = []
+    for mat in bpy.data.materials:
+        if not mat or not hasattr(mat, 'name'):
+            continue
+            
+        # <<< FIX: Skip our internal hashing materials from appearing in the UI list >>>
+        if mat.name.startswith("__hashing_"):
+            continue
+
+        try:
+            all_mats_data.append({
+                'mat_obj': mat,
+                'uuid': get_material_uuid(mat),
+                'display_name': mat_get_display_name(mat),
+                'is_library': bool(mat.library),
+                'is_protected': mat.get('is_protected', False),
+                'original_name': mat.get("orig_name", mat_get_display_name(mat)),
+            })
+        except (ReferenceError, Exception):
+            continue
+
+    # Step 3: De-duplicate the list to get a single, canonical entry per material concept
+    material_info_map = {}
+    mat_prefix_candidates = {}
+    
+    for item_info_dict in all_mats_data:
+        display_name = item_info_dict['display_name']
+        if display_name.startswith("mat_"):
+            # Find the "base" material (e.g., mat_Plastic from mat_Plastic.001, .002)
+            base_name, suffix_num = _parse_material_suffix(display_name)
+            item_info_dict['suffix_num'] = suffix_num
+            existing = mat_prefix_candidates.get(base_name)
+            if not existing or suffix_num < existing['suffix_num']:
+                mat_prefix_candidates[base_name] = item_info_dict
+        else:
+            # Ensure only one entry per UUID (preferring local over library versions)
+            uuid = item_info_dict['uuid']
+            existing = material_info_map.get(uuid)
+            if not existing or (not item_info_dict['is_library'] and existing['is_library']):
+                material_info_map[uuid] = item_info_dict
+    
+    # Add the de-duplicated mat_ items to the main map
+    for base_name, chosen_info in mat_prefix_candidates.items():
+        if chosen_info['uuid'] not in material_info_map:
+            material_info_map[chosen_info['uuid']] = chosen_info
+    
+    items_to_process_for_ui = list(material_info_map.values())
+    
+    # Step 4: Sort the de-duplicated list based on the scene property
+    if scene.material_list_sort_alpha:
+        sorted_list = sorted(items_to_process_for_ui, key=lambda item: item['display_name'].lower())
+    else:  # Default sort by recency from database
+        material_sort_indices = {}
+        try:
+            with get_db_connection() as conn:
+                c = conn.cursor()
+                c.execute("SELECT uuid, sort_index FROM material_order")
+                material_sort_indices = {row[0]: row[1] for row in c.fetchall()}
+        except Exception as e:
+            print(f"[Populate List] Error loading sort indices: {e}")
+        
+        for info in items_to_process_for_ui:
+            info['sort_key'] = material_sort_indices.get(info['uuid'], -1)
+        sorted_list = sorted(items_to_process_for_ui, key=lambda item: -item['sort_key'])
+    return sorted_list
+
+def _list_matches_rows(list_items, sorted_rows):
+    """True if the stored material_list_items already hold exactly `sorted_rows`, in order."""
+    if len(list_items) != len(sorted_rows):
+        return False
+    for list_item, item_data in zip(list_items, sorted_rows):
+        if (list_item.material_uuid != item_data['uuid'] or list_item.material_name != item_data['display_name']
+                or list_item.is_library != item_data['is_library'] or list_item.original_name != item_data['original_name']
+                or list_item.is_protected != bool(item_data['is_protected'])):
+            return False
+    return True
+
+def populate_material_list(scene, *, called_from_finalize_run=False, sorted_rows=None):
     """
     Builds the complete, unfiltered master material list.
     All filtering is now handled by the much faster UIList.filter_items method.
+    `sorted_rows` (from _build_material_list_rows) skips recomputing rows the caller already has.
     """
     global material_list_cache, list_version
     
@@ -1652,6 +1928,9 @@ def populate_material_list(scene, *, called_from_finalize_run=False):
         print("[Populate List] Error: Scene object is None.")
         return
 
+    _last_populate_uuid_to_index.clear()
+    _list_original_name_counts.clear()
+
     print("[Populate List] Rebuilding master material list (unfiltered)...")
 
     try:
@@ -1663,75 +1942,14 @@ def populate_material_list(scene, *, called_from_finalize_run=False):
         
         material_list_cache.clear()
 
-        all_mats_data = []
-        for mat in bpy.data.materials:
-            if not mat or not hasattr(mat, 'name'):
-                continue
-                
-            # <<< FIX: Skip our internal hashing materials from appearing in the UI list >>>
-            if mat.name.startswith("__hashing_"):
-                continue
-
-            try:
-                all_mats_data.append({
-                    'mat_obj': mat,
-                    'uuid': get_material_uuid(mat),
-                    'display_name': mat_get_display_name(mat),
-                    'is_library': bool(mat.library),
-                    'is_protected': mat.get('is_protected', False),
-                    'original_name': mat.get("orig_name", mat_get_display_name(mat)),
-                })
-            except (ReferenceError, Exception):
-                continue
-
-        # Step 3: De-duplicate the list to get a single, canonical entry per material concept
-        material_info_map = {}
-        mat_prefix_candidates = {}
-        
-        for item_info_dict in all_mats_data:
-            display_name = item_info_dict['display_name']
-            if display_name.startswith("mat_"):
-                # Find the "base" material (e.g., mat_Plastic from mat_Plastic.001, .002)
-                base_name, suffix_num = _parse_material_suffix(display_name)
-                item_info_dict['suffix_num'] = suffix_num
-                existing = mat_prefix_candidates.get(base_name)
-                if not existing or suffix_num < existing['suffix_num']:
-                    mat_prefix_candidates[base_name] = item_info_dict
-            else:
-                # Ensure only one entry per UUID (preferring local over library versions)
-                uuid = item_info_dict['uuid']
-                existing = material_info_map.get(uuid)
-                if not existing or (not item_info_dict['is_library'] and existing['is_library']):
-                    material_info_map[uuid] = item_info_dict
-        
-        # Add the de-duplicated mat_ items to the main map
-        for base_name, chosen_info in mat_prefix_candidates.items():
-            if chosen_info['uuid'] not in material_info_map:
-                material_info_map[chosen_info['uuid']] = chosen_info
-        
-        items_to_process_for_ui = list(material_info_map.values())
-        
-        # Step 4: Sort the de-duplicated list based on the scene property
-        if scene.material_list_sort_alpha:
-            sorted_list = sorted(items_to_process_for_ui, key=lambda item: item['display_name'].lower())
-        else:  # Default sort by recency from database
-            material_sort_indices = {}
-            try:
-                with get_db_connection() as conn:
-                    c = conn.cursor()
-                    c.execute("SELECT uuid, sort_index FROM material_order")
-                    material_sort_indices = {row[0]: row[1] for row in c.fetchall()}
-            except Exception as e:
-                print(f"[Populate List] Error loading sort indices: {e}")
-            
-            for info in items_to_process_for_ui:
-                info['sort_key'] = material_sort_indices.get(info['uuid'], -1)
-            sorted_list = sorted(items_to_process_for_ui, key=lambda item: -item['sort_key'])
+        sorted_list = sorted_rows if sorted_rows is not None else _build_material_list_rows(scene)
 
         # Step 5: Populate Blender's list and our fast UI cache
         current_list_version_for_pop = list_version # Capture version before populating
 
-        for item_data in sorted_list:
+        for row_index, item_data in enumerate(sorted_list):
+            _last_populate_uuid_to_index[item_data['uuid']] = row_index
+            _list_original_name_counts[item_data['original_name']] += 1
             list_item = scene.material_list_items.add()
             list_item.material_name = item_data['display_name']
             list_item.material_uuid = item_data['uuid']
@@ -1760,6 +1978,92 @@ def populate_material_list(scene, *, called_from_finalize_run=False):
         print(f"[Populate List] CRITICAL error during list population: {e}")
         traceback.print_exc()
 
+def _rebuild_material_list_cache(scene):
+    """
+    Rebuilds only the fast UI cache (material_list_cache) from the scene's existing
+    material_list_items, without touching the items themselves or the database.
+    """
+    global list_version
+    material_list_cache.clear()
+    _last_populate_uuid_to_index.clear()
+    _list_original_name_counts.clear()
+    for row_index, list_item in enumerate(scene.material_list_items):
+        _last_populate_uuid_to_index[list_item.material_uuid] = row_index
+        _list_original_name_counts[list_item.original_name] += 1
+        material_list_cache.append({
+            'uuid': list_item.material_uuid,
+            'icon_id': 0,
+            'version': list_version,
+            'is_missing': get_material_by_uuid(list_item.material_uuid) is None,
+            'display_name': list_item.material_name,
+            'is_protected': list_item.is_protected
+        })
+    list_version += 1
+
+def replace_material_users(old_mat, new_mat):
+    """
+    Points every local slot that uses `old_mat` at `new_mat`. Returns the number of slots changed.
+    The users are found in C via bpy.data.user_map, so only the objects/obdata that actually
+    reference `old_mat` are visited rather than every object in the file. Linked users are
+    left alone since edits to library data are not saved.
+    """
+    replaced = 0
+    users = bpy.data.user_map(subset={old_mat}).get(old_mat, ())
+    for user in users:
+        if getattr(user, "library", None) is not None:
+            continue
+        if isinstance(user, bpy.types.Object):
+            # Object-linked slots; data-linked ones are handled through the obdata user below
+            for slot in user.material_slots:
+                if slot.link == 'OBJECT' and slot.material == old_mat:
+                    slot.material = new_mat
+                    replaced += 1
+        elif hasattr(user, "materials"):
+            mats = user.materials
+            for i, m in enumerate(mats):
+                if m == old_mat:
+                    mats[i] = new_mat
+                    replaced += 1
+    return replaced
+
+def find_list_index_by_uuid(scene, target_uuid):
+    """
+    Row of `target_uuid` in scene.material_list_items, or -1.
+    O(1) via the index left by the last list build; verified against the row and
+    falls back to a scan if the list was changed behind its back.
+    """
+    items = scene.material_list_items
+    idx = _last_populate_uuid_to_index.get(target_uuid, -1)
+    if 0 <= idx < len(items) and items[idx].material_uuid == target_uuid:
+        return idx
+    for i, itm in enumerate(items):
+        if itm.material_uuid == target_uuid:
+            return i
+    return -1
+
+def move_list_item_to_top(scene, target_uuid):
+    """
+    UI-side counterpart of promote_material_by_recency_counter: moves the promoted row to
+    the top of material_list_items (and the draw cache) in place instead of rebuilding the
+    whole list. Falls back to populate_material_list if the row is missing or the cache is
+    out of step. With alphabetical sorting recency does not affect the order, so the row
+    stays where it is. Returns the row's index afterwards, or -1.
+    """
+    items = scene.material_list_items
+    idx = find_list_index_by_uuid(scene, target_uuid)
+    if idx == -1 or len(material_list_cache) != len(items) or material_list_cache[idx]['uuid'] != target_uuid:
+        populate_material_list(scene)
+        return find_list_index_by_uuid(scene, target_uuid)
+    if scene.material_list_sort_alpha:
+        return idx
+    if idx > 0:
+        items.move(idx, 0)
+        material_list_cache.insert(0, material_list_cache.pop(idx))
+        # Only rows 0..idx shifted
+        for row in range(idx + 1):
+            _last_populate_uuid_to_index[material_list_cache[row]['uuid']] = row
+    return 0
+
 def get_material_by_unique_id(unique_id): # Unchanged
     for mat in bpy.data.materials:
         if str(id(mat)) == unique_id: return mat
@@ -1785,6 +2089,13 @@ def initialize_db_connection_pool():
 
             # This tells SQLite to wait for 10 seconds if the DB is locked before erroring out.
             conn = sqlite3.connect(DATABASE_FILE, check_same_thread=False, timeout=10.0)
+            # Per-connection tuning, paid once here instead of on every pooled use
+            try:
+                conn.execute("PRAGMA journal_mode=WAL") # Readers no longer block the writer thread / workers
+                conn.execute("PRAGMA synchronous=NORMAL") # Safe with WAL; avoids an fsync per commit
+                conn.execute("PRAGMA cache_size=-20000") # ~20 MB page cache per connection
+            except sqlite3.Error as e_pragma:
+                print(f"[DB Pool] Warning: could not apply PRAGMAs: {e_pragma}")
             
             temp_connections.append(conn)
 
@@ -1808,6 +2119,8 @@ def save_pre_handler(dummy):
 
     print(f"\n[{datetime.now().strftime('%H:%M:%S.%f')[:-3]} SAVE_PRE] Triggered.")
 
+    flush_material_names_now()
+
     # Synchronously initialize any new materials BEFORE processing them.
     # This now correctly skips "mat_" materials.
     initialize_material_properties()
@@ -1847,14 +2160,23 @@ def non_blocking_task_collector():
     it IMMEDIATELY queues it for the workers instead of waiting for the scan
     to finish. This provides instant feedback to the user.
     """
-    global g_task_collection_iterator, g_thumbnail_process_ongoing
+    global g_task_collection_iterator, g_thumbnail_process_ongoing, _icon_template_unavailable
 
     # If the iterator hasn't been created, create it.
     if g_task_collection_iterator is None:
         # This generator yields one material at a time.
         g_task_collection_iterator = (mat for mat in bpy.data.materials)
+        # New run: give a template that failed to build last time another chance. get_custom_icon
+        # checks it only once a thumbnail is actually missing, and existing ones still load without it.
+        _icon_template_unavailable = False
 
     # Process a small chunk of materials in this timer tick
+    return _collect_task_batch()
+
+def _collect_task_batch():
+    """One non_blocking_task_collector tick: scans up to COLLECTION_BATCH_SIZE materials, returns the timer interval."""
+    global g_task_collection_iterator
+
     for _ in range(COLLECTION_BATCH_SIZE):
         try:
             # Get the next material from our generator
@@ -1867,7 +2189,7 @@ def non_blocking_task_collector():
 
             # If a task is returned, queue it IMMEDIATELY
             if isinstance(task, dict):
-                print(f"[Collector] Found task for '{mat.name}'. Queuing immediately.")
+                if _DEBUG: print(f"[Collector] Found task for '{mat.name}'. Queuing immediately.")
                 _queue_all_pending_tasks(single_task_list=[task])
                 ensure_thumbnail_queue_processor_running()
 
@@ -1935,21 +2257,36 @@ def save_post_handler(dummy=None):
 
     print(f"[POST-SAVE] handler Python time: {time.time() - t0:.4f}s")
 
+def _material_user_shows_it(user, mat):
+    """
+    True if `user` (from bpy.data.user_map) really puts `mat` on a mesh. Data-linked slots
+    report the Mesh as user, which only counts if something besides a fake user holds the
+    mesh; object-linked slots report the Object, which only counts for a slot whose link is
+    'OBJECT' (with link='DATA' the object's own material is stored but not shown).
+    """
+    if isinstance(user, bpy.types.Mesh):
+        return user.users - int(user.use_fake_user) > 0
+    if isinstance(user, bpy.types.Object) and user.type == 'MESH':
+        return any(slot.link == 'OBJECT' and slot.material == mat for slot in user.material_slots)
+    return False
+
 def _log_blend_material_usage():
     """Write / refresh the blend_material_usage rows for this .blend."""
     if not bpy.data.filepath or not os.path.exists(LIBRARY_FILE):
         return
 
-    library_norm = os.path.normcase(os.path.abspath(LIBRARY_FILE))
     used_lib_uuids = set()
 
-    for obj in bpy.data.objects:
-        if obj.type != 'MESH':
-            continue
-        for slot in obj.material_slots:
-            mat = slot.material
-            if mat and mat.library and \
-               os.path.normcase(bpy.path.abspath(mat.library.filepath)) == library_norm:
+    # Start from the (few) materials linked from the library and ask Blender who uses them,
+    # rather than sweeping every object's slots and normalising a library path per slot.
+    target_library = _library_by_path(LIBRARY_FILE)
+    if target_library is None:
+        lib_mats = []
+    else:
+        lib_mats = [m for m in bpy.data.materials if m.library == target_library]
+    if lib_mats:
+        for mat, users in bpy.data.user_map(subset=set(lib_mats)).items():
+            if any(_material_user_shows_it(u, mat) for u in users):
                 uid = get_material_uuid(mat)
                 if uid:
                     used_lib_uuids.add(uid)
@@ -1971,6 +2308,8 @@ def load_post_handler(dummy):
     global g_thumbnail_process_ongoing, g_material_creation_timestamp_at_process_start
     global g_tasks_for_current_run, g_library_update_pending, g_current_run_task_hashes_being_processed
 
+    # Persist pending renames before material_names is cleared for the new file
+    flush_material_names_now()
 
     if hasattr(bpy.context.window_manager, 'matlist_save_handler_processed'):
         bpy.context.window_manager.matlist_save_handler_processed = False
@@ -1978,7 +2317,7 @@ def load_post_handler(dummy):
 
     # --- AGGRESSIVE THUMBNAIL SYSTEM RESET FOR NEW FILE ---
     global thumbnail_monitor_timer_active, thumbnail_worker_pool, thumbnail_task_queue
-    global thumbnail_pending_on_disk_check, thumbnail_generation_scheduled
+    global thumbnail_pending_on_disk_check
     global persistent_icon_template_scene
 
 
@@ -1999,9 +2338,7 @@ def load_post_handler(dummy):
             process = worker_info.get('process')
             if process and hasattr(process, 'poll') and process.poll() is None:
                 try:
-                    # <<< MODIFICATION: Replace terminate/kill logic >>>
-                    time.sleep(0.1)
-                    process.kill()
+                    process.kill() # No pre-kill sleep: it only stalled the UI thread before an unconditional kill
                 except Exception as e_term:
                     print(f"  Error terminating worker (PID: {process.pid if hasattr(process,'pid') else 'N/A'}): {e_term}")
         thumbnail_worker_pool.clear()
@@ -2009,7 +2346,6 @@ def load_post_handler(dummy):
 
     thumbnail_task_queue = Queue() # New, empty queue
     thumbnail_pending_on_disk_check.clear()
-    thumbnail_generation_scheduled.clear()
     persistent_icon_template_scene = None # Reset cached template scene in main addon
     # print("[DEBUG LoadPost] Thumbnail task queue, tracking dicts, and cached template scene cleared.")
     
@@ -2028,7 +2364,9 @@ def load_post_handler(dummy):
     # print("[DEBUG LoadPost] Clearing file-specific caches: _display_name_cache, global_hash_cache, material_list_cache, material_names, material_hashes")
     _display_name_cache.clear()
     _display_name_cache_version = 0
+    _uuid_mat_cache.clear()
     global_hash_cache.clear()
+    _icon_hash_cache.clear()
     material_list_cache.clear() 
     material_names.clear()
     material_hashes.clear()
@@ -2038,22 +2376,6 @@ def load_post_handler(dummy):
     if not bpy.app.timers.is_registered(delayed_load_post):
         bpy.app.timers.register(delayed_load_post, first_interval=0.3)
 
-def file_changed_handler(scene): # Unchanged
-    try:
-        if not scene: return
-        if scene.workspace_mode == 'REFERENCE':
-            for obj in scene.objects:
-                if obj.type == 'MESH' and obj.name in reference_backup:
-                    ref = reference_backup[obj.name]
-                    current_slots_count = len(obj.material_slots)
-                    ref_slots_count = len(ref) if ref else None
-                    current = [slot.material.name if (slot.material and slot.material.name.startswith("mat_")) else None for slot in obj.material_slots]
-                    if ref is None or current_slots_count != ref_slots_count or current != ref:
-                        scene.workspace_mode = 'EDITING'
-                        if not editing_backup: backup_current_assignments(editing_backup, 'editing')
-                        force_redraw(); break
-    except Exception as e: print(f"Error in file_changed_handler: {e}")
-
 @persistent
 def delayed_load_post(): # Unchanged in core logic, but benefits from other fixes (cache clearing in load_post_handler)
     global custom_icons, material_names, material_hashes, global_hash_cache
@@ -2063,6 +2385,10 @@ def delayed_load_post(): # Unchanged in core logic, but benefits from other fixe
         print("[DEBUG] delayed_load_post: No scene found, aborting.");
         return None
 
+    # Set whenever something the material list shows may have changed; a pristine,
+    # already-consistent file then skips the full list rebuild + thumbnail kickoff.
+    list_dirty = not len(getattr(scene, "material_list_items", ()))
+
     print("[DEBUG delayed_load_post] Loading names and hashes...")
     load_material_names() # Loads into global material_names
     load_material_hashes() # Loads into global material_hashes
@@ -2070,10 +2396,23 @@ def delayed_load_post(): # Unchanged in core logic, but benefits from other fixe
         global_hash_cache.clear() # Clear before repopulating
         for uid, h_val in material_hashes.items(): global_hash_cache[uid] = h_val
 
+    # Single pass over the datablocks: reset dirty flags on local materials and collect
+    # the UUIDs needed by the library link filter below.
+    # Resolve the library datablock once so the per-material test is a datablock compare
+    target_library = _library_by_path(LIBRARY_FILE)
+    existing_local_material_uuids = set()
+    currently_linked_from_lib_by_uuid_prop = set()
     for mat in bpy.data.materials:
         if not mat.library:
             try: mat["hash_dirty"] = False # Reset dirty flag
             except Exception: pass
+            local_uuid_prop = mat.get("uuid")
+            if local_uuid_prop:
+                existing_local_material_uuids.add(local_uuid_prop)
+        elif mat.library == target_library: # RNA equality is a pointer compare
+            linked_uuid_prop = mat.get("uuid")
+            if linked_uuid_prop:
+                currently_linked_from_lib_by_uuid_prop.add(linked_uuid_prop)
     print(f"[DEBUG delayed_load_post] Loaded {len(material_names)} names, {len(material_hashes)} hashes.")
 
     print("[Delayed Load] Managing preview icon cache...")
@@ -2082,81 +2421,70 @@ def delayed_load_post(): # Unchanged in core logic, but benefits from other fixe
         try:
             custom_icons = bpy.utils.previews.new()
             if custom_icons is not None:
+                # No bulk preload: get_custom_icon loads each thumbnail from disk the first time it is drawn
                 print(f"[Delayed Load] New preview collection created: {custom_icons}")
-                if 'preload_existing_thumbnails' in globals() and callable(preload_existing_thumbnails):
-                    preload_existing_thumbnails() # Preload into the new collection
+                _loaded_icon_lru.clear()
+                _known_good_icons.clear()
+                _thumb_mtime_cache.clear()
             else: print("[Delayed Load] CRITICAL ERROR: bpy.utils.previews.new() returned None!")
         except Exception as e_new_delayed: print(f"[Delayed Load] CRITICAL Error creating preview collection: {e_new_delayed}"); traceback.print_exc()
-    else: # custom_icons already exists
-        print(f"[Delayed Load] custom_icons already exists ({custom_icons}). Calling preload to update.")
-        if 'preload_existing_thumbnails' in globals() and callable(preload_existing_thumbnails):
-            preload_existing_thumbnails() # Safe to call, skips already loaded
+    else: # custom_icons already exists; missing thumbnails are loaded lazily on first draw
+        print(f"[Delayed Load] custom_icons already exists ({custom_icons}).")
 
     # --- Link Library Materials & Correct Names Post-Link ---
     if os.path.exists(LIBRARY_FILE):
         print("[DEBUG] delayed_load_post: Linking library materials...")
         try:
-            library_path_norm = os.path.normcase(os.path.abspath(LIBRARY_FILE))
-            existing_local_material_uuids = set()
-            for local_mat_check in bpy.data.materials:
-                if not local_mat_check.library: 
-                    local_uuid_prop = local_mat_check.get("uuid")
-                    if local_uuid_prop:
-                        existing_local_material_uuids.add(local_uuid_prop)
             if existing_local_material_uuids:
-                print(f"[DEBUG PostLink] Found existing local material UUIDs: {existing_local_material_uuids}")
+                if _DEBUG: print(f"[DEBUG PostLink] Found existing local material UUIDs: {existing_local_material_uuids}")
             else:
-                print(f"[DEBUG PostLink] No existing local materials with UUID properties found.")
+                if _DEBUG: print(f"[DEBUG PostLink] No existing local materials with UUID properties found.")
             
-            currently_linked_from_lib_by_uuid_prop = { 
-                mat.get("uuid") for mat in bpy.data.materials
-                if mat.library and hasattr(mat.library, 'filepath') and
-                   os.path.normcase(bpy.path.abspath(mat.library.filepath)) == library_path_norm and
-                   mat.get("uuid") 
-            }
             if currently_linked_from_lib_by_uuid_prop:
-                print(f"[DEBUG PostLink] Found materials ALREADY LINKED from this library (by UUID prop): {currently_linked_from_lib_by_uuid_prop}")
+                if _DEBUG: print(f"[DEBUG PostLink] Found materials ALREADY LINKED from this library (by UUID prop): {currently_linked_from_lib_by_uuid_prop}")
 
             with bpy.data.libraries.load(LIBRARY_FILE, link=True) as (data_from, data_to):
                 if hasattr(data_from, 'materials') and data_from.materials:
                     mats_to_link_by_name = []
-                    print(f"[DEBUG PostLink] Considering materials from library file ({LIBRARY_FILE}): {list(data_from.materials)}")
+                    local_material_names = {m.name for m in bpy.data.materials if not m.library} # One snapshot, not a lookup per library entry
+                    if _DEBUG: print(f"[DEBUG PostLink] Considering materials from library file ({LIBRARY_FILE}): {list(data_from.materials)}")
                     for lib_mat_name in data_from.materials:
                         uuid_of_material_in_library = lib_mat_name
                         if uuid_of_material_in_library in existing_local_material_uuids:
-                            print(f"[DEBUG PostLink] SKIPPING link for '{lib_mat_name}': A local material with UUID '{uuid_of_material_in_library}' already exists.")
+                            if _DEBUG: print(f"[DEBUG PostLink] SKIPPING link for '{lib_mat_name}': A local material with UUID '{uuid_of_material_in_library}' already exists.")
                             continue 
                         if uuid_of_material_in_library in currently_linked_from_lib_by_uuid_prop:
-                            print(f"[DEBUG PostLink] SKIPPING link for '{lib_mat_name}': Already linked from this library (checked by UUID prop).")
+                            if _DEBUG: print(f"[DEBUG PostLink] SKIPPING link for '{lib_mat_name}': Already linked from this library (checked by UUID prop).")
                             continue 
-                        local_material_with_same_name = bpy.data.materials.get(lib_mat_name)
-                        if local_material_with_same_name and not local_material_with_same_name.library:
-                            print(f"[DEBUG PostLink] SKIPPING link for '{lib_mat_name}': A local material with the same DATABLOCK NAME exists (and has no UUID prop or wasn't caught by previous UUID check).")
+                        if lib_mat_name in local_material_names:
+                            if _DEBUG: print(f"[DEBUG PostLink] SKIPPING link for '{lib_mat_name}': A local material with the same DATABLOCK NAME exists (and has no UUID prop or wasn't caught by previous UUID check).")
                             continue
                         mats_to_link_by_name.append(lib_mat_name)
                     if mats_to_link_by_name:
-                        print(f"[DEBUG PostLink] Requesting link for names (after filtering): {mats_to_link_by_name}")
+                        if _DEBUG: print(f"[DEBUG PostLink] Requesting link for names (after filtering): {mats_to_link_by_name}")
                         data_to.materials = mats_to_link_by_name
+                        list_dirty = True
                     else:
-                        print(f"[DEBUG PostLink] No materials left to link after filtering.")
-
-            for mat in bpy.data.materials:
-                if mat.library and hasattr(mat.library, 'filepath') and \
-                   os.path.normcase(bpy.path.abspath(mat.library.filepath)) == library_path_norm:
-                    base_uuid_from_datablock_name = mat.name.split('.')[0]
-                    current_uuid_prop = mat.get("uuid")
-                    if not current_uuid_prop:
-                        try:
-                            mat["uuid"] = base_uuid_from_datablock_name
-                            print(f"[DEBUG PostLink] Set missing UUID custom property for linked '{mat.name}' to '{base_uuid_from_datablock_name}'.")
-                        except Exception as e_set_uuid:
-                            print(f"[DEBUG PostLink] Error setting UUID prop for linked '{mat.name}': {e_set_uuid}")
-                    elif current_uuid_prop != base_uuid_from_datablock_name:
-                        if len(current_uuid_prop) == 36 and current_uuid_prop != base_uuid_from_datablock_name:
-                             print(f"[DEBUG PostLink] Warning: Linked mat '{mat.name}' has UUID prop '{current_uuid_prop}' "
-                                   f"which differs from its datablock base name '{base_uuid_from_datablock_name}'. "
-                                   f"Check consistency of material_library.blend.")
-                        pass
+                        if _DEBUG: print(f"[DEBUG PostLink] No materials left to link after filtering.")
+
+            # Repair UUID props on exactly the materials just linked. Materials already linked
+            # were collected by their UUID prop above, so there is nothing to repair on them and
+            # no need for a second full scan of bpy.data.materials.
+            for mat in getattr(data_to, 'materials', None) or ():
+                if mat is None:
+                    continue
+                base_uuid_from_datablock_name = mat.name.split('.')[0]
+                current_uuid_prop = mat.get("uuid")
+                if not current_uuid_prop:
+                    try:
+                        mat["uuid"] = base_uuid_from_datablock_name
+                        if _DEBUG: print(f"[DEBUG PostLink] Set missing UUID custom property for linked '{mat.name}' to '{base_uuid_from_datablock_name}'.")
+                    except Exception as e_set_uuid:
+                        print(f"[DEBUG PostLink] Error setting UUID prop for linked '{mat.name}': {e_set_uuid}")
+                elif len(current_uuid_prop) == 36 and current_uuid_prop != base_uuid_from_datablock_name:
+                    print(f"[DEBUG PostLink] Warning: Linked mat '{mat.name}' has UUID prop '{current_uuid_prop}' "
+                          f"which differs from its datablock base name '{base_uuid_from_datablock_name}'. "
+                          f"Check consistency of material_library.blend.")
         except Exception as e: print(f"[DEBUG] delayed_load_post: Error linking library materials: {e}"); traceback.print_exc()
     else: print(f"[DEBUG] delayed_load_post: Library file not found at {LIBRARY_FILE}.")
 
@@ -2165,20 +2493,42 @@ def delayed_load_post(): # Unchanged in core logic, but benefits from other fixe
     # This is already being called per your logs for "New File" scenario.
     if 'initialize_material_properties' in globals() and callable(initialize_material_properties):
         print("[DEBUG delayed_load_post] Calling initialize_material_properties.")
-        initialize_material_properties()
+        if initialize_material_properties():
+            list_dirty = True
     else:
         print("[DEBUG delayed_load_post] ERROR: initialize_material_properties function not found!")
 
     # --- Key section for UI refresh and thumbnail initiation on ANY file load ---
-    if 'populate_material_list' in globals() and callable(populate_material_list):
+    sorted_rows = None
+    if not list_dirty:
+        # material_names and material_order are shared by every .blend, so renames or recency changes
+        # made while another file was open leave this file's stored rows stale. Compare against the
+        # exact rows populate would write (order, names, missing or extra materials); only the
+        # collection writes are skipped when they match.
+        try:
+            sorted_rows = _build_material_list_rows(scene)
+            list_dirty = not _list_matches_rows(scene.material_list_items, sorted_rows)
+        except Exception as e:
+            print(f"[DEBUG delayed_load_post] Could not validate the stored list, rebuilding it: {e}")
+            sorted_rows = None; list_dirty = True
+
+    if not list_dirty:
+        # The list stored in the .blend is still accurate; only the in-memory draw cache
+        # (cleared by load_post_handler) needs rebuilding. Icons are fetched lazily on draw.
+        print("[DEBUG delayed_load_post] No material changes after load. Skipping full list rebuild.")
+        _rebuild_material_list_cache(scene)
+        # populate_material_list would have started this; thumbnails missing or outdated on open still need queuing
+        if 'update_material_thumbnails' in globals():
+            update_material_thumbnails()
+    elif 'populate_material_list' in globals() and callable(populate_material_list):
         print(f"[DEBUG delayed_load_post] Calling populate_material_list for scene '{scene.name}' on file load.")
         # The `called_from_finalize_run` flag will be False by default here,
         # so populate_material_list will call update_material_thumbnails.
-        populate_material_list(scene)
+        populate_material_list(scene, sorted_rows=sorted_rows)
     else:
         print("[DEBUG delayed_load_post] ERROR: populate_material_list function not found!")
 
-    if 'force_redraw' in globals() and callable(force_redraw):
+    if list_dirty and 'force_redraw' in globals() and callable(force_redraw):
         print("[DEBUG delayed_load_post] Forcing redraw after populate_material_list.")
         force_redraw()
     # --- End key section ---
@@ -2237,9 +2587,13 @@ class MATERIALLIST_OT_rename_material(Operator):
             self.report({'WARNING'}, "Empty name not allowed.")
             return {'CANCELLED'}
 
-        # Get the current display name of the primary material (the one being explicitly renamed)
-        # This uses the mat_get_display_name helper which consults the material_names DB.
-        current_primary_display_name = mat_get_display_name(primary_mat_obj)
+        # Fast path for the common "OK without changing the name" case: a plain dict compare
+        stored_display_name = material_names.get(primary_material_uuid)
+        if stored_display_name is not None:
+            current_primary_display_name = stored_display_name
+        else:
+            # No DB entry yet; mat_get_display_name falls back to the datablock name
+            current_primary_display_name = mat_get_display_name(primary_mat_obj)
 
         if new_display_name_str == current_primary_display_name:
             self.report({'INFO'}, "Display name is already set to that.")
@@ -2251,7 +2605,7 @@ class MATERIALLIST_OT_rename_material(Operator):
         needs_db_names_save = False # Flag to track if material_names DB needs to be saved
 
         # 1. Update the primary material's display name in the material_names dictionary (in-memory)
-        print(f"[Rename DB] Updating display name for primary UUID {primary_material_uuid} from '{current_primary_display_name}' to '{new_display_name_str}'")
+        if _DEBUG: print(f"[Rename DB] Updating display name for primary UUID {primary_material_uuid} from '{current_primary_display_name}' to '{new_display_name_str}'")
         material_names[primary_material_uuid] = new_display_name_str
         needs_db_names_save = True
         
@@ -2262,11 +2616,11 @@ class MATERIALLIST_OT_rename_material(Operator):
 
         # 3. Save material_names to DB if any changes were made (primary name was changed)
         if needs_db_names_save:
-            print("[Rename DB] Saving updated material display names to database.")
-            save_material_names() # This saves the entire material_names dictionary
+            if _DEBUG: print("[Rename DB] Scheduling save of updated material display names.")
+            schedule_material_names_save([primary_material_uuid]) # Debounced; consecutive renames coalesce into one write
 
-        # 4. Clear display name cache and refresh UI list to reflect all changes
-        _display_name_cache.clear()
+        # 4. Invalidate only the renamed material's cached display name and refresh the UI list
+        _display_name_cache.pop(primary_mat_obj.name, None)
         populate_material_list(scene) # This will rebuild the list items based on new names from material_names
         
         # 5. Report results to the user
@@ -2274,15 +2628,11 @@ class MATERIALLIST_OT_rename_material(Operator):
         self.report({'INFO'}, report_message)
         
         # Try to find the originally selected (primary) material in the newly populated list and select it
-        new_idx_for_primary = -1
-        for i, current_list_item_iter in enumerate(scene.material_list_items):
-            if current_list_item_iter.material_uuid == primary_material_uuid:
-                new_idx_for_primary = i
-                break
+        new_idx_for_primary = find_list_index_by_uuid(scene, primary_material_uuid)
         
         if new_idx_for_primary != -1:
             scene.material_list_active_index = new_idx_for_primary
-            print(f"[Rename DB] Reselected primary renamed item '{new_display_name_str}' at new index {new_idx_for_primary}.")
+            if _DEBUG: print(f"[Rename DB] Reselected primary renamed item '{new_display_name_str}' at new index {new_idx_for_primary}.")
         else:
             # Fallback if the primary item (somehow) isn't found after refresh.
             print(f"[Rename DB] Warning: Could not find primary item with UUID {primary_material_uuid} after renaming and list refresh. List may have changed significantly.")
@@ -2341,9 +2691,11 @@ class MATERIALLIST_OT_duplicate_or_localise_material(Operator):
         # --- BRANCH 1: The selected material is from the LIBRARY ---
         if original_mat.library:
             try:
-                # This block contains the logic from the old "Make Local" operator
+                # This block contains the logic from the old "Make Local" operator.
+                # copy() of a linked material is already local (ID.library is read-only).
+                # Images and actions are shared with the original; only the embedded
+                # node tree is duplicated, which Blender requires per material.
                 local_mat = original_mat.copy()
-                local_mat.library = None # Make it a local datablock
                 
                 new_local_uuid = str(uuid.uuid4())
                 local_mat["uuid"] = new_local_uuid
@@ -2351,7 +2703,7 @@ class MATERIALLIST_OT_duplicate_or_localise_material(Operator):
                 
                 # Keep the original display name for the new local copy
                 material_names[new_local_uuid] = original_display_name
-                save_material_names()
+                schedule_material_names_save([new_local_uuid])
                 
                 local_mat["from_library_uuid"] = get_material_uuid(original_mat)
                 local_mat.use_fake_user = True
@@ -2360,13 +2712,10 @@ class MATERIALLIST_OT_duplicate_or_localise_material(Operator):
                 promote_material_by_recency_counter(new_local_uuid)
                 
                 # Replace all instances of the library material with the new local one
-                for obj in bpy.data.objects:
-                    if obj.material_slots:
-                        for slot in obj.material_slots:
-                            if slot.material == original_mat:
-                                slot.material = local_mat
+                replace_material_users(original_mat, local_mat)
                                 
-                _display_name_cache.clear()
+                # The new UUID has no cache entry yet, so nothing else needs invalidating
+                _display_name_cache.pop(local_mat.name, None)
                 populate_and_reset_selection(context)
                 
                 if hasattr(local_mat, "preview"):
@@ -2382,7 +2731,8 @@ class MATERIALLIST_OT_duplicate_or_localise_material(Operator):
         # --- BRANCH 2: The selected material is already LOCAL ---
         else:
             try:
-                # This block contains the logic from the old "Duplicate" operator
+                # This block contains the logic from the old "Duplicate" operator.
+                # copy() shares images/actions; only the node tree is duplicated.
                 new_mat = original_mat.copy()
                 
                 new_local_uuid = str(uuid.uuid4())
@@ -2394,14 +2744,14 @@ class MATERIALLIST_OT_duplicate_or_localise_material(Operator):
                 new_display_name = get_unique_display_name(f"{base_name}.copy")
                 
                 material_names[new_local_uuid] = new_display_name
-                save_material_names()
+                schedule_material_names_save([new_local_uuid])
                 
                 new_mat.use_fake_user = True
                 
                 # Promote the new duplicate to the top of the recency list
                 promote_material_by_recency_counter(new_local_uuid)
                 
-                _display_name_cache.clear()
+                _display_name_cache.pop(new_mat.name, None)
                 populate_and_reset_selection(context)
 
                 self.report({'INFO'}, f"Duplicated local material '{original_display_name}' as '{new_display_name}'")
@@ -2426,7 +2776,7 @@ class MATERIALLIST_OT_pack_library_textures(Operator):
 
     @classmethod
     def poll(cls, context):
-        return LIBRARY_FILE and os.path.exists(LIBRARY_FILE)
+        return LIBRARY_FILE and _cached_exists(LIBRARY_FILE)
 
     def modal(self, context, event):
         if event.type == 'TIMER':
@@ -2458,9 +2808,7 @@ class MATERIALLIST_OT_pack_library_textures(Operator):
                 context.window_manager.event_timer_remove(self._timer)
                 self._timer = None
             if self._proc and self._proc.poll() is None:
-                # <<< MODIFICATION: Replace terminate/kill logic >>>
-                time.sleep(0.1)
-                self._proc.kill()
+                self._proc.kill() # No pre-kill sleep: it only stalled the UI thread before an unconditional kill
                 self._proc = None
                 self.report({'INFO'}, "Library packing cancelled by user.")
             self._cleanup_temp_dir()
@@ -2567,6 +2915,25 @@ def is_mat_prefixed(slot_mat):
         and mat_get_display_name(slot_mat).startswith("mat_")
     )
 
+def _all_faces_use_slot(mesh_data, slot_index):
+    """True if every polygon of `mesh_data` already has material_index == slot_index (one bulk read)."""
+    face_count = len(mesh_data.polygons)
+    if not face_count:
+        return True
+    face_slots = np.empty(face_count, dtype=np.int32)
+    mesh_data.polygons.foreach_get("material_index", face_slots)
+    return bool(np.all(face_slots == slot_index))
+
+def _slot_index_of(mesh_data, mat):
+    """Slot index of `mat` on `mesh_data`, or -1. Uses Blender's C-side name lookup instead of a Python loop."""
+    if not mat:
+        return -1
+    idx = mesh_data.materials.find(mat.name)
+    # find() matches by name only; confirm identity so a same-named linked/local twin is not mistaken for it
+    if idx != -1 and mesh_data.materials[idx] != mat:
+        return next((i for i, m in enumerate(mesh_data.materials) if m == mat), -1)
+    return idx
+
 class MATERIALLIST_OT_unassign_mat(bpy.types.Operator):
     """Remove material slots containing materials that start with 'mat_' from all mesh objects"""
     bl_idname = "materiallist.unassign_mat"
@@ -2576,23 +2943,31 @@ class MATERIALLIST_OT_unassign_mat(bpy.types.Operator):
     def execute(self, context):
         view_layer = context.view_layer
         initial_active = view_layer.objects.active
-        initial_mode = context.mode
+        # object.mode ('EDIT') is what mode_set expects; context.mode ('EDIT_MESH') is not
+        initial_mode = initial_active.mode if initial_active else 'OBJECT'
 
-        # Ensure we're in Object Mode once
-        if bpy.ops.object.mode_set.poll():
+        # Switch to Object Mode once for the whole batch, and only if we are not already there
+        mode_switched = False
+        if initial_mode != 'OBJECT' and bpy.ops.object.mode_set.poll():
             bpy.ops.object.mode_set(mode='OBJECT')
+            mode_switched = True
 
         processed_objects = 0
         total_removed = 0
 
+        # Resolve the 'mat_' materials once; per-slot tests are then identity set lookups
+        remove_mats_set = {m for m in bpy.data.materials if m.name.startswith('mat_')}
+
         # Loop through all mesh objects
         for obj in context.scene.objects:
             if obj.type != 'MESH':
                 continue
 
-            mats = obj.data.materials
+            mesh = obj.data
+            mats = mesh.materials
             # Build a filtered list of slots to keep
-            kept = [m for m in mats if not (m and m.name.startswith('mat_'))]
+            keep_flags = [m not in remove_mats_set for m in mats]
+            kept = [m for m, keep in zip(mats, keep_flags) if keep]
             removed = len(mats) - len(kept)
             if removed <= 0:
                 continue
@@ -2600,17 +2975,36 @@ class MATERIALLIST_OT_unassign_mat(bpy.types.Operator):
             processed_objects += 1
             total_removed += removed
 
+            # Old slot index -> new slot index. Faces on a removed slot fall back to the
+            # preceding slot, matching Blender's own material_slot_remove behaviour.
+            remap = np.empty(len(keep_flags), dtype=np.int32)
+            kept_so_far = 0
+            for i, keep in enumerate(keep_flags):
+                remap[i] = kept_so_far if keep else max(kept_so_far - 1, 0)
+                kept_so_far += keep
+
+            # materials.clear() resets every face to slot 0, so read the indices first
+            face_count = len(mesh.polygons)
+            face_slots = np.empty(face_count, dtype=np.int32)
+            if face_count:
+                mesh.polygons.foreach_get("material_index", face_slots)
+
             # Bulk‐remove & reassign
             mats.clear()
             for mat in kept:
                 mats.append(mat)
 
+            if face_count:
+                np.clip(face_slots, 0, len(remap) - 1, out=face_slots)
+                mesh.polygons.foreach_set("material_index", remap[face_slots])
+                mesh.update()
+
         # Restore original active object
         if initial_active and initial_active.name in bpy.data.objects:
             view_layer.objects.active = initial_active
 
-        # Restore original mode
-        if bpy.ops.object.mode_set.poll():
+        # Restore original mode (only if we actually left it)
+        if mode_switched and bpy.ops.object.mode_set.poll():
             bpy.ops.object.mode_set(mode=initial_mode)
 
         self.report(
@@ -2713,13 +3107,8 @@ class MATERIALLIST_OT_add_material_to_slot(Operator):
             )
             return {"CANCELLED"}
 
-        mat_exists = False
-        target_slot_index = -1
-        for i, slot in enumerate(mesh_data.materials):
-            if slot == target_mat:
-                mat_exists = True
-                target_slot_index = i
-                break
+        target_slot_index = _slot_index_of(mesh_data, target_mat)
+        mat_exists = target_slot_index != -1
 
         action_taken = False
         if mat_exists:
@@ -2745,12 +3134,8 @@ class MATERIALLIST_OT_add_material_to_slot(Operator):
             # --- The only change is this line ---
             promote_material_by_recency_counter(target_uuid)
             
-            populate_material_list(scene)
-            new_idx = -1
-            for i, itm in enumerate(scene.material_list_items):
-                if itm.material_uuid == target_uuid:
-                    new_idx = i
-                    break
+            # Assigning only re-ranks one row; no full rebuild needed
+            new_idx = move_list_item_to_top(scene, target_uuid)
             scene.material_list_active_index = (
                 new_idx if new_idx != -1 else 0 if scene.material_list_items else -1
             )
@@ -2809,12 +3194,8 @@ class MATERIALLIST_OT_assign_selected_material(Operator):
             # --- The only change is this line ---
             promote_material_by_recency_counter(target_uuid)
             
-            populate_material_list(scene)
-            new_idx = -1
-            for i, itm in enumerate(scene.material_list_items):
-                if itm.material_uuid == target_uuid:
-                    new_idx = i
-                    break
+            # Assigning only re-ranks one row; no full rebuild needed
+            new_idx = move_list_item_to_top(scene, target_uuid)
             scene.material_list_active_index = (
                 new_idx if new_idx != -1 else 0 if scene.material_list_items else -1
             )
@@ -2855,28 +3236,41 @@ class MATERIALLIST_OT_assign_to_object(Operator):
     target_material_name: StringProperty()
 
     def execute(self, context):
+        # Resolved once per call; accepts a datablock name or a UUID like assign_to_faces
         target_mat = bpy.data.materials.get(self.target_material_name)
+        if not target_mat:
+            target_mat = get_material_by_uuid(self.target_material_name)
         if not target_mat:
             self.report({'ERROR'}, "Target material not found")
             return {'CANCELLED'}
-        original_mode = context.mode
+        target_name = target_mat.name
         for ob in context.selected_objects:
             if ob.type != 'MESH': continue
-            if target_mat.name not in ob.data.materials:
-                ob.data.materials.append(target_mat)
-            target_index = ob.data.materials.find(target_mat.name)
-            context.view_layer.objects.active = ob
-            with context.temp_override(window=context.window, area=context.area, region=context.region, active_object=ob, object=ob):
-                if ob.mode != 'EDIT': bpy.ops.object.mode_set(mode='EDIT')
-                bm = bmesh.from_edit_mesh(ob.data)
-                bm.faces.ensure_lookup_table()
+            mesh = ob.data
+            target_index = _slot_index_of(mesh, target_mat)
+            if target_index == -1:
+                mesh.materials.append(target_mat)
+                target_index = len(mesh.materials) - 1 # append() always adds the last slot
+            elif ob.mode != 'EDIT' and _all_faces_use_slot(mesh, target_index):
+                # Re-click on the material the object already uses everywhere: nothing to write
+                ob.active_material_index = target_index
+                continue
+            if ob.mode == 'EDIT':
+                # Edit-mode data lives in the BMesh; writes to mesh.polygons would be overwritten on exit
+                bm = bmesh.from_edit_mesh(mesh)
                 for face in bm.faces:
                     face.select = True
                     face.material_index = target_index
-                bmesh.update_edit_mesh(ob.data)
-                bpy.ops.object.mode_set(mode=original_mode)
+                bmesh.update_edit_mesh(mesh)
+            else:
+                # Object mode: one bulk write per attribute, no edit-mode round trip
+                face_count = len(mesh.polygons)
+                if face_count:
+                    mesh.polygons.foreach_set("material_index", np.full(face_count, target_index, dtype=np.int32))
+                    mesh.polygons.foreach_set("select", np.ones(face_count, dtype=bool))
+                    mesh.update()
             ob.active_material_index = target_index
-        self.report({'INFO'}, f"Assigned '{target_mat.name}' to all faces of selected objects")
+        self.report({'INFO'}, f"Assigned '{target_name}' to all faces of selected objects")
         return {'FINISHED'}
 
 class MATERIALLIST_OT_assign_to_faces(Operator):
@@ -2893,37 +3287,40 @@ class MATERIALLIST_OT_assign_to_faces(Operator):
             self.report({"ERROR"}, "Target material not found")
             return {"CANCELLED"}
 
+        target_name = target_mat.name
         for ob in context.selected_objects:
             if ob.type != 'MESH': continue
             try:
-                bpy.context.view_layer.objects.active = ob
-                if len(ob.data.materials) == 0:
-                    ob.data.materials.append(target_mat)
-                elif target_mat.name not in [m.name for m in ob.data.materials if m]:
-                    ob.data.materials.append(target_mat)
-                target_index = ob.data.materials.find(target_mat.name)
-                original_mode = ob.mode
-                if original_mode == 'OBJECT':
-                    bpy.ops.object.mode_set(mode='EDIT')
-                    bpy.ops.mesh.select_all(action='SELECT') # Select all faces if in object mode
-                    ob.active_material_index = target_index # Set active slot
-                    bpy.ops.object.material_slot_assign() # Assign to selected faces
-                else: # EDIT_MESH
-                    bm = bmesh.from_edit_mesh(ob.data)
+                mesh = ob.data
+                # One C-side lookup instead of building a name list per object and then find()
+                target_index = _slot_index_of(mesh, target_mat)
+                if target_index == -1:
+                    mesh.materials.append(target_mat)
+                    target_index = len(mesh.materials) - 1 # append() always adds the last slot
+                elif ob.mode != 'EDIT' and _all_faces_use_slot(mesh, target_index):
+                    ob.active_material_index = target_index # Already assigned to every face
+                    continue
+                if ob.mode == 'EDIT':
+                    # Assign to the selected faces directly; no material_slot_assign operator call
+                    bm = bmesh.from_edit_mesh(mesh)
                     selected_faces = [f for f in bm.faces if f.select]
                     if not selected_faces:
                         self.report({'WARNING'}, f"No faces selected in '{ob.name}'. Skipping assignment.")
-                        if original_mode == 'OBJECT': bpy.ops.object.mode_set(mode='OBJECT') # Revert mode if changed
                         continue
-                    ob.active_material_index = target_index # Set active slot
-                    bpy.ops.object.material_slot_assign() # Assign to selected faces (BMesh not strictly needed here)
-                if original_mode == 'OBJECT':
-                    bpy.ops.object.mode_set(mode='OBJECT')
-                self.report({'INFO'}, f"Assigned '{target_mat.name}' to faces of '{ob.name}'")
+                    for face in selected_faces:
+                        face.material_index = target_index
+                    bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+                else:
+                    # Object mode meant "all faces": bulk-write instead of edit-mode toggle + select_all + operator
+                    face_count = len(mesh.polygons)
+                    if face_count:
+                        mesh.polygons.foreach_set("material_index", np.full(face_count, target_index, dtype=np.int32))
+                        mesh.polygons.foreach_set("select", np.ones(face_count, dtype=bool))
+                        mesh.update()
+                ob.active_material_index = target_index # Set active slot
+                self.report({'INFO'}, f"Assigned '{target_name}' to faces of '{ob.name}'")
             except Exception as e:
                 self.report({'ERROR'}, f"Error processing {ob.name}: {str(e)}")
-                if 'original_mode' in locals() and original_mode == 'OBJECT' and ob.mode == 'EDIT':
-                    bpy.ops.object.mode_set(mode='OBJECT') # Try to revert mode on error
                 continue
         return {'FINISHED'}
 
@@ -2938,8 +3335,6 @@ class MATERIALLIST_OT_rename_to_albedo(bpy.types.Operator):
 
     def execute(self, context):
         global material_names, _display_name_cache
-        renamed_count = 0
-        needs_name_db_save = False
         print("[RenameToAlbedo] Starting rename process...")
         if not all(func in globals() for func in ['mat_get_display_name', 'get_material_uuid', 'find_principled_bsdf', 'save_material_names', 'populate_material_list']):
             self.report({'ERROR'}, "Required helper function(s) not found.")
@@ -2952,11 +3347,18 @@ class MATERIALLIST_OT_rename_to_albedo(bpy.types.Operator):
                 self.report({'ERROR'}, "load_material_names function not found.")
                 return {'CANCELLED'}
 
+        # One pass collecting {uuid: new display name}; names are applied, saved and
+        # invalidated in a single batch afterwards.
+        name_updates = {}
+        renamed_datablock_names = []
+        image_base_names = {} # image name_full -> display base; albedo maps are often shared
         for mat in bpy.data.materials:
-            if not mat: continue
-            current_display_name = mat_get_display_name(mat)
+            # Cheapest RNA checks first, before any UUID / display-name work
+            if not mat or not mat.use_nodes or not mat.node_tree: continue
+            mat_uuid = get_material_uuid(mat)
+            # Same resolution as mat_get_display_name, without a second UUID lookup
+            current_display_name = material_names.get(mat_uuid, mat.name) if mat_uuid else mat.name
             if current_display_name.startswith("mat_"): continue
-            if not mat.use_nodes or not mat.node_tree: continue
             principled_node = find_principled_bsdf(mat)
             if not principled_node: continue
             base_color_input = principled_node.inputs.get('Base Color')
@@ -2968,25 +3370,28 @@ class MATERIALLIST_OT_rename_to_albedo(bpy.types.Operator):
             if not source_node or source_node.bl_idname != 'ShaderNodeTexImage' or not source_node.image: continue
             albedo_image = source_node.image
             try:
-                new_display_name_base = os.path.splitext(albedo_image.name_full)[0]
+                image_key = albedo_image.name_full
+                new_display_name_base = image_base_names.get(image_key)
+                if new_display_name_base is None:
+                    new_display_name_base = image_base_names[image_key] = os.path.splitext(image_key)[0]
             except Exception as e:
                 print(f"[RenameToAlbedo] Error getting base name for image '{getattr(albedo_image, 'name', 'N/A')}' on material '{current_display_name}': {e}")
                 continue
             if new_display_name_base and new_display_name_base != current_display_name:
-                mat_uuid = get_material_uuid(mat)
                 if mat_uuid:
-                    print(f"[RenameToAlbedo] Renaming display name for UUID {mat_uuid} ('{current_display_name}') -> '{new_display_name_base}'")
-                    material_names[mat_uuid] = new_display_name_base
-                    needs_name_db_save = True
-                    renamed_count += 1
+                    if _DEBUG: print(f"[RenameToAlbedo] Renaming display name for UUID {mat_uuid} ('{current_display_name}') -> '{new_display_name_base}'")
+                    name_updates[mat_uuid] = new_display_name_base
+                    renamed_datablock_names.append(mat.name)
                 else:
                     print(f"[RenameToAlbedo] Warning: Could not get UUID for material '{mat.name}' to rename.")
-        if needs_name_db_save:
-            print("[RenameToAlbedo] Saving updated display names to database...")
+        renamed_count = len(name_updates)
+        if name_updates:
+            material_names.update(name_updates)
+            print(f"[RenameToAlbedo] Saving {renamed_count} updated display names to database...")
             try:
-                save_material_names()
-                _display_name_cache.clear()
-                print("[RenameToAlbedo] Display name cache cleared.")
+                save_material_names(name_updates.keys())
+                for datablock_name in renamed_datablock_names:
+                    _display_name_cache.pop(datablock_name, None)
             except Exception as e_save:
                 print(f"[RenameToAlbedo] Error saving material names: {e_save}")
                 self.report({'ERROR'}, f"Error saving names: {e_save}")
@@ -3025,18 +3430,16 @@ class MATERIALLIST_OT_make_local(Operator):
             self.report({'ERROR'}, "Selected material is not a library material."); return {'CANCELLED'}
         try:
             display_name_from_lib = mat_get_display_name(lib_mat)
-            local_mat = lib_mat.copy(); local_mat.library = None
+            local_mat = lib_mat.copy() # copy() of a linked ID is already local
             new_local_uuid = str(uuid.uuid4()); local_mat["uuid"] = new_local_uuid
             local_mat.name = new_local_uuid
             material_names[new_local_uuid] = display_name_from_lib
+            schedule_material_names_save([new_local_uuid])
             local_mat["from_library_uuid"] = get_material_uuid(lib_mat)
             local_mat.use_fake_user = True
             promote_material_by_recency_counter(new_local_uuid)
-            for obj in bpy.data.objects:
-                if obj.material_slots:
-                    for slot in obj.material_slots:
-                        if slot.material == lib_mat: slot.material = slot.material
-            _display_name_cache.clear()
+            replace_material_users(lib_mat, local_mat)
+            _display_name_cache.pop(local_mat.name, None)
             
             populate_and_reset_selection(context)
 
@@ -3054,84 +3457,6 @@ class MATERIALLIST_OT_sort_alphabetically(Operator):
         populate_material_list(context.scene)
         return {'FINISHED'}
 
-class MATERIALLIST_OT_PollMaterialChanges(Operator):
-    bl_idname = "materiallist.poll_material_changes"
-    bl_label = "Poll Material Changes (Reference Mode Only)"
-    _timer = None
-
-    def modal(self, context, event):
-        if getattr(context, 'area', None) is None: return {'PASS_THROUGH'}
-        if event.type == 'TIMER':
-            scene = context.scene
-            if not scene: return {'PASS_THROUGH'}
-            if scene.workspace_mode == 'REFERENCE':
-                change_detected = False
-                obj_checked = None
-                for obj in scene.objects:
-                    if obj.type == 'MESH' and obj.material_slots:
-                        ref_backup_slots = reference_backup.get(obj.name)
-                        current_mat_slots = [
-                            slot.material.name if (slot.material and slot.material.name.startswith("mat_")) else None
-                            for slot in obj.material_slots
-                        ]
-                        if ref_backup_slots is None:
-                            if any(m is not None for m in current_mat_slots):
-                                print(f"[MaterialList Polling] Change detected in '{obj.name}': No reference backup, but 'mat_' slots currently exist.")
-                                change_detected = True; obj_checked = obj.name; break
-                            else: continue
-                        elif len(current_mat_slots) != len(ref_backup_slots):
-                            print(f"[MaterialList Polling] Change detected in '{obj.name}': Slot count differs ({len(current_mat_slots)} current vs {len(ref_backup_slots)} in ref).")
-                            change_detected = True; obj_checked = obj.name; break
-                        elif current_mat_slots != ref_backup_slots:
-                            if not current_mat_slots and not ref_backup_slots: continue
-                            print(f"[MaterialList Polling] Change detected in '{obj.name}': Slot content differs.")
-                            change_detected = True; obj_checked = obj.name; break
-                if change_detected:
-                    print(f"[MaterialList Polling] Switching to EDITING mode due to detected change in '{obj_checked}'.")
-                    try:
-                        if scene and scene.name in bpy.data.scenes:
-                            scene.workspace_mode = 'EDITING'
-                        else:
-                            print("[MaterialList Polling] Scene lost before mode switch. Stopping timer.")
-                    except ReferenceError: print("[MaterialList Polling] Scene reference lost before mode switch. Stopping timer.")
-                    except Exception as e_mode: print(f"[MaterialList Polling] Error switching mode: {e_mode}. Stopping timer.")
-                    self.cancel(context)
-                    return {'CANCELLED'}
-        return {'PASS_THROUGH'}
-
-    def execute(self, context):
-        if MATERIALLIST_OT_PollMaterialChanges._timer is not None:
-            print("[MaterialList Polling] Modal timer is already running.")
-            return {'CANCELLED'}
-        wm = context.window_manager
-        window = context.window
-        if not window:
-            if wm.windows: window = wm.windows[0]
-            else:
-                print("[MaterialList Polling] Error: Cannot start timer without a window context.")
-                return {'CANCELLED'}
-        print("[MaterialList Polling] Adding modal timer.")
-        MATERIALLIST_OT_PollMaterialChanges._timer = wm.event_timer_add(1.5, window=window)
-        wm.modal_handler_add(self)
-        print("[MaterialList] Started modal polling for material changes (checks only in Reference mode).")
-        return {'RUNNING_MODAL'}
-
-    def cancel(self, context):
-        wm = context.window_manager
-        timer_was_active = False
-        if MATERIALLIST_OT_PollMaterialChanges._timer:
-            timer_was_active = True
-            try:
-                timer_copy = MATERIALLIST_OT_PollMaterialChanges._timer
-                MATERIALLIST_OT_PollMaterialChanges._timer = None
-                wm.event_timer_remove(timer_copy)
-            except ValueError: print("[MaterialList Polling] Warning: Timer already removed before cancel() call.")
-            except Exception as e: print(f"[MaterialList] Error removing timer: {e}")
-            if hasattr(bpy.types.Operator, 'MATERIALLIST_OT_PollMaterialChanges'):
-                MATERIALLIST_OT_PollMaterialChanges._timer = None
-        if timer_was_active: print("[MaterialList] Stopped modal polling timer.")
-        return None
-
 class MATERIALLIST_OT_refresh_material_list(Operator):
     bl_idname = "materiallist.refresh_material_list"
     bl_label = "Refresh List & Check Thumbs"
@@ -3175,68 +3500,71 @@ class MATERIALLIST_OT_integrate_library(Operator):
             if os.path.exists(LIBRARY_FILE) and os.path.samefile(self.filepath, LIBRARY_FILE): self.report({'WARNING'}, "Cannot integrate main library into itself."); return {'CANCELLED'}
         except: pass
         if not material_names: load_material_names()
-        main_lib_content_hashes = set(); main_lib_names_to_process = []; loaded_main_lib_mats_objs = []; error_loading_main = None
-        if os.path.exists(LIBRARY_FILE):
-            print(f"[Integrate Lib DB] Loading main library for hashing...")
+        main_lib_content_hashes = set(); loaded_main_lib_mats_objs = []; error_loading_main = None
+        # Shared across both libraries so each texture's bytes are read and digested once per run
+        integrate_image_hash_cache = {}
+        cached_main_lib_hashes = load_main_lib_hash_cache() if os.path.exists(LIBRARY_FILE) else None
+        if cached_main_lib_hashes is not None:
+            # Library unchanged since it was last hashed: skip the load/hash/remove cycle entirely
+            print(f"[Integrate Lib DB] Using cached hashes for {len(cached_main_lib_hashes)} main library materials.")
+            main_lib_content_hashes = set(h for h in cached_main_lib_hashes.values() if h)
+        elif os.path.exists(LIBRARY_FILE):
+            print(f"[Integrate Lib DB] Linking main library for hashing...")
+            main_link_state = None
             try:
-                with bpy.data.libraries.load(LIBRARY_FILE, link=False) as (data_from, data_to):
-                    if data_from.materials:
-                        main_lib_names_to_process = list(data_from.materials)
-                        names_to_request_load = [n for n in main_lib_names_to_process if n not in bpy.data.materials or bpy.data.materials[n].library]
-                        data_to.materials = names_to_request_load if names_to_request_load else []
-                    else: main_lib_names_to_process = []
-                for mat_name in main_lib_names_to_process:
-                    mat_obj = bpy.data.materials.get(mat_name)
-                    if mat_obj and mat_obj.library is None: loaded_main_lib_mats_objs.append(mat_obj)
+                # Linked, not appended: hashing only reads node trees, so nothing needs copying in
+                loaded_main_lib_mats_objs, main_link_state = _link_library_materials(LIBRARY_FILE)
+                main_lib = _library_by_path(LIBRARY_FILE)
+                if main_lib: prefetch_image_hashes([img for img in bpy.data.images if img.library == main_lib], integrate_image_hash_cache)
+                main_lib_hashes_by_name = {}
                 for mat_obj in loaded_main_lib_mats_objs:
-                    content_hash = get_material_hash(mat_obj)
+                    content_hash = get_material_hash(mat_obj, image_hash_cache=integrate_image_hash_cache)
+                    main_lib_hashes_by_name[mat_obj.name] = content_hash
                     if content_hash: main_lib_content_hashes.add(content_hash)
+                save_main_lib_hash_cache(main_lib_hashes_by_name)
             except Exception as e: error_loading_main = e; print(f"[Integrate Lib DB] Error main lib hash: {e}")
             finally:
-                print(f"[Integrate Lib DB] Step 1d: Cleaning up {len(main_lib_names_to_process)} requested main library materials by name...")
-                mats_removed_count_main = 0
-                for name in main_lib_names_to_process:
-                    mat_to_remove = bpy.data.materials.get(name)
-                    if mat_to_remove and mat_to_remove.library is None:
-                        try: bpy.data.materials.remove(mat_to_remove); mats_removed_count_main += 1
-                        except Exception as remove_err: print(f"[Integrate Lib DB] Warning: Error removing temporary main lib mat '{name}': {remove_err}")
-                print(f"[Integrate Lib DB] Removed {mats_removed_count_main} temporary main library materials found locally.")
-                main_lib_names_to_process.clear(); loaded_main_lib_mats_objs.clear()
+                loaded_main_lib_mats_objs.clear()
+                if main_link_state:
+                    try: _release_library_links(main_link_state)
+                    except Exception as release_err: print(f"[Integrate Lib DB] Warning: Error releasing main library links: {release_err}")
                 if error_loading_main: self.report({'ERROR'}, f"Error processing main library: {error_loading_main}"); return {'CANCELLED'}
         else: print("[Integrate Lib DB] Main library not found.")
-        materials_to_add_refs = []; selected_names_to_process = []; loaded_selected_mats_objs = []; error_loading_selected = None
-        print(f"[Integrate Lib DB] Loading selected library: {self.filepath}")
+        materials_to_add_names = []; loaded_selected_mats_objs = []; materials_to_add_refs = []; error_loading_selected = None
+        print(f"[Integrate Lib DB] Linking selected library for hashing: {self.filepath}")
+        selected_link_state = None
         try:
-            with bpy.data.libraries.load(self.filepath, link=False) as (data_from, data_to):
-                if data_from.materials:
-                    selected_names_to_process = list(data_from.materials)
-                    names_to_request_load_sel = [n for n in selected_names_to_process if n not in bpy.data.materials or bpy.data.materials[n].library]
-                    data_to.materials = names_to_request_load_sel if names_to_request_load_sel else []
-                else: selected_names_to_process = []
-            for mat_name in selected_names_to_process:
-                mat_obj = bpy.data.materials.get(mat_name)
-                if mat_obj and mat_obj.library is None: loaded_selected_mats_objs.append(mat_obj)
-            skipped_count = 0; added_to_queue_count = 0
+            loaded_selected_mats_objs, selected_link_state = _link_library_materials(self.filepath)
+            selected_lib = _library_by_path(self.filepath)
+            if selected_lib: prefetch_image_hashes([img for img in bpy.data.images if img.library == selected_lib], integrate_image_hash_cache)
+            skipped_count = 0
             for mat_obj in loaded_selected_mats_objs:
-                content_hash = get_material_hash(mat_obj)
+                content_hash = get_material_hash(mat_obj, image_hash_cache=integrate_image_hash_cache)
                 if not content_hash: skipped_count+=1; continue
                 if content_hash not in main_lib_content_hashes:
-                    materials_to_add_refs.append(mat_obj)
+                    materials_to_add_names.append(mat_obj.name) # Name inside the selected file
                     main_lib_content_hashes.add(content_hash)
-                    added_to_queue_count+=1
                 else: skipped_count+=1
-            print(f"[Integrate Lib DB] Identified {added_to_queue_count} unique materials to add, skipped {skipped_count}.")
+            print(f"[Integrate Lib DB] Identified {len(materials_to_add_names)} unique materials to add, skipped {skipped_count}.")
         except Exception as e: error_loading_selected = e; print(f"[Integrate Lib DB] Error selected lib process: {e}")
+        finally:
+            loaded_selected_mats_objs.clear()
+            if selected_link_state:
+                try: _release_library_links(selected_link_state)
+                except Exception as release_err: print(f"[Integrate Lib DB] Warning: Error releasing selected library links: {release_err}")
+        if not error_loading_selected and materials_to_add_names:
+            # Only the unique subset is appended (real copies); everything else was only ever linked
+            try:
+                with bpy.data.libraries.load(self.filepath, link=False) as (data_from, data_to):
+                    data_to.materials = materials_to_add_names
+                materials_to_add_refs = [m for m in data_to.materials if m is not None]
+            except Exception as e: error_loading_selected = e; print(f"[Integrate Lib DB] Error appending unique materials: {e}")
         copied_count = 0; newly_added_uuids = []; needs_name_db_save_integrate = False
         if not error_loading_selected and materials_to_add_refs:
-            print(f"[Integrate Lib DB] Copying {len(materials_to_add_refs)} unique materials locally...")
-            for source_mat_obj in materials_to_add_refs:
-                if not isinstance(source_mat_obj, bpy.types.Material): continue
-                check_obj = bpy.data.materials.get(source_mat_obj.name)
-                if not check_obj or check_obj != source_mat_obj: continue
+            print(f"[Integrate Lib DB] Adopting {len(materials_to_add_refs)} appended unique materials locally...")
+            for new_local_mat in materials_to_add_refs:
                 try:
-                    display_name_from_source = mat_get_display_name(source_mat_obj)
-                    new_local_mat = source_mat_obj.copy(); new_local_mat.library = None
+                    display_name_from_source = mat_get_display_name(new_local_mat)
                     new_uuid = str(uuid.uuid4()); new_local_mat["uuid"] = new_uuid
                     try: new_local_mat.name = new_uuid
                     except Exception: new_local_mat.name = f"{new_uuid}_local_copy"
@@ -3247,28 +3575,25 @@ class MATERIALLIST_OT_integrate_library(Operator):
                     promote_material_by_recency_counter(new_uuid)
                     
                     new_local_mat["hash_dirty"] = True; new_local_mat.use_fake_user = True
-                    print(f"[Integrate Lib DB] Copied '{display_name_from_source}' as local '{new_local_mat.name}', added name to DB, moved to top of list.")
+                    if _DEBUG: print(f"[Integrate Lib DB] Copied '{display_name_from_source}' as local '{new_local_mat.name}', added name to DB, moved to top of list.")
                     copied_count += 1; newly_added_uuids.append(new_uuid)
-                except Exception as copy_err: print(f"[Integrate Lib DB] Error copying '{source_mat_obj.name}': {copy_err}")
+                except Exception as copy_err: print(f"[Integrate Lib DB] Error adopting '{new_local_mat.name}': {copy_err}")
+            print(f"[Integrate Lib DB] Copied {copied_count} of {len(materials_to_add_refs)} unique materials locally.")
         elif error_loading_selected: print("[Integrate Lib DB] Skipping copy phase due to errors.")
         else: print("[Integrate Lib DB] No unique materials to copy locally.")
         try:
-            mats_removed_count_sel = 0
-            print(f"[Integrate Lib DB] Cleaning up {len(selected_names_to_process)} temporary selected materials...")
-            for name in selected_names_to_process:
-                mat_to_remove = bpy.data.materials.get(name)
-                if mat_to_remove and mat_to_remove.library is None:
-                    current_uuid = mat_to_remove.get("uuid")
-                    if not current_uuid or current_uuid not in newly_added_uuids:
-                        try: bpy.data.materials.remove(mat_to_remove); mats_removed_count_sel += 1
-                        except Exception as remove_err: print(f"[Integrate Lib DB] Warning: Error removing temporary mat '{name}': {remove_err}")
-            print(f"[Integrate Lib DB] Removed {mats_removed_count_sel} temporary selected materials.")
+            # Appended materials that failed to be adopted must not linger in the file
+            newly_added_uuid_set = set(newly_added_uuids)
+            to_remove = [m for m in materials_to_add_refs if m.get("uuid") not in newly_added_uuid_set]
+            if to_remove:
+                try: bpy.data.batch_remove(ids=to_remove)
+                except Exception as remove_err: print(f"[Integrate Lib DB] Warning: Error removing {len(to_remove)} unadopted mats: {remove_err}")
         finally:
-            selected_names_to_process.clear(); loaded_selected_mats_objs.clear(); materials_to_add_refs.clear()
+            materials_to_add_names.clear(); materials_to_add_refs.clear()
         if error_loading_selected: self.report({'ERROR'}, f"Error processing selected file: {error_loading_selected}"); return {'CANCELLED'}
         if needs_name_db_save_integrate:
             print("[Integrate Lib DB] Saving updated material display names added during integration...")
-            save_material_names(); _display_name_cache.clear()
+            save_material_names(newly_added_uuids); _display_name_cache.clear()
         if copied_count > 0:
             print(f"[Integrate Lib DB] Triggering main library update and UI refresh...")
             try:
@@ -3284,6 +3609,141 @@ class MATERIALLIST_OT_integrate_library(Operator):
         print("[Integrate Lib DB] Finished.")
         return {'FINISHED'}
 
+def _list_dir_names(dir_path):
+    """normcase'd entry names of `dir_path`, or an empty set if it is gone or unreadable."""
+    try:
+        with os.scandir(dir_path) as entries:
+            return {os.path.normcase(entry.name) for entry in entries}
+    except OSError:
+        return set()
+
+_path_exists_cache = {} # path: (checked_at, exists), for poll() methods that run every UI redraw
+PATH_EXISTS_TTL = 2.0 # Seconds; files appearing/disappearing are noticed within this window
+
+def _cached_exists(path):
+    """os.path.exists with a short TTL, so polling the same few paths does not stat on every redraw."""
+    now = time.monotonic()
+    cached = _path_exists_cache.get(path)
+    if cached is not None and now - cached[0] < PATH_EXISTS_TTL:
+        return cached[1]
+    exists = os.path.exists(path)
+    _path_exists_cache[path] = (now, exists)
+    return exists
+
+def _existing_paths(paths):
+    """
+    Subset of `paths` that exist on disk, listing each parent directory once with os.scandir
+    instead of stat'ing every file (a big difference for many project files on a network share).
+    Directories are listed concurrently, since each listing is a blocking round-trip on remote storage.
+    """
+    paths_by_dir = {}
+    for path in paths:
+        paths_by_dir.setdefault(os.path.dirname(path), []).append(path)
+    dirs = list(paths_by_dir)
+    if len(dirs) > 1:
+        with ThreadPoolExecutor(max_workers=min(32, len(dirs))) as executor:
+            names_per_dir = list(executor.map(_list_dir_names, dirs))
+    else:
+        names_per_dir = [_list_dir_names(d) for d in dirs]
+    existing = set()
+    for dir_path, names in zip(dirs, names_per_dir):
+        existing.update(p for p in paths_by_dir[dir_path] if os.path.normcase(os.path.basename(p)) in names)
+    return existing
+
+def _pump_worker_output(pipe, prefix):
+    """Echoes a worker pipe line by line as it arrives, so nothing is buffered for the whole run."""
+    try:
+        for line in iter(pipe.readline, ''):
+            print(f"{prefix}{line}", end='' if line.endswith('\n') else '\n')
+    finally:
+        pipe.close()
+
+def _run_blend_worker(cmd, label, timeout=600):
+    """
+    Runs one background Blender worker to completion, streaming its output to the console
+    (each line tagged with `label`). Returns the exit code, or None if it timed out and was killed.
+    """
+    # stderr merged into stdout: one pipe and one pump thread per worker, original line order kept.
+    # Own session on POSIX, so a timeout kill also reaches any children that inherited the pipe.
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                               encoding='utf-8', errors='replace', bufsize=1,
+                               start_new_session=(os.name == 'posix'))
+    pump = Thread(target=_pump_worker_output, args=(process.stdout, f"      [{label}] "), daemon=True)
+    pump.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if os.name == 'posix':
+            try: os.killpg(process.pid, signal.SIGKILL)
+            except OSError: process.kill()
+        else:
+            process.kill()
+        process.wait()
+        returncode = None
+    # A grandchild still holding the pipe open would keep the pump reading forever; never wait on it unbounded.
+    # The pipe is not closed from here: closing it blocks on the pump's in-progress readline.
+    pump.join(timeout=5.0)
+    if pump.is_alive():
+        print(f"      [{label}] Output pipe still held open by a child process; no longer echoing it.")
+    return returncode
+
+def run_blend_workers_pooled(cmds_by_path, max_workers):
+    """
+    Runs one worker per {blend path: cmd}, at most `max_workers` at a time, and waits for all of them.
+    Worker output is streamed live, tagged with the file name. Returns (succeeded, failed).
+    """
+    succeeded = failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(_run_blend_worker, cmd, os.path.basename(path)): path for path, cmd in cmds_by_path.items()}
+        for future in as_completed(futures):
+            base_name = os.path.basename(futures[future])
+            try:
+                returncode = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"    ERROR launching/managing worker for '{base_name}': {type(e).__name__}: {e}")
+                if _DEBUG: traceback.print_exception(type(e), e, e.__traceback__)
+                continue
+            if returncode == 0:
+                succeeded += 1
+                print(f"    Worker for '{base_name}' completed successfully.")
+            elif returncode is None:
+                failed += 1
+                print(f"    Worker for '{base_name}' TIMED OUT after 600 seconds.")
+            else:
+                failed += 1
+                print(f"    Worker for '{base_name}' FAILED with code {returncode}.")
+            sys.stdout.flush() # The one flush per worker: its result is on the console as soon as it lands
+    return succeeded, failed
+
+def _unpack_dirs_by_blend(blend_paths, external_dir):
+    """Distinct texture output folders (normcased) the pack_to_external worker resolves for `blend_paths`."""
+    if not external_dir.startswith('//'):
+        return {os.path.normcase(os.path.normpath(external_dir))}
+    return {os.path.normcase(os.path.normpath(os.path.join(os.path.dirname(p), external_dir[2:]))) for p in blend_paths}
+
+def _reap_background_pack_workers():
+    """
+    Timer: reports and drops no-wait pack workers that have exited, so their exit codes are not
+    lost and finished processes do not linger as zombies. Reschedules itself while any are running.
+    """
+    still_running = False
+    for op_cls in (MATERIALLIST_OT_pack_textures_externally, MATERIALLIST_OT_pack_textures_internally):
+        remaining = []
+        for proc, blend_path in op_cls._processes:
+            returncode = proc.poll()
+            if returncode is None:
+                remaining.append((proc, blend_path)); continue
+            outcome = "completed successfully" if returncode == 0 else f"FAILED with code {returncode}"
+            print(f"    Background worker for '{os.path.basename(blend_path)}' {outcome}.")
+        op_cls._processes[:] = remaining
+        still_running = still_running or bool(remaining)
+    return 2.0 if still_running else None
+
+def _ensure_pack_worker_reaper():
+    if not bpy.app.timers.is_registered(_reap_background_pack_workers):
+        bpy.app.timers.register(_reap_background_pack_workers, first_interval=2.0)
+
 class MATERIALLIST_OT_pack_textures_externally(bpy.types.Operator):
     bl_idname = "materiallist.pack_textures_externally"
     bl_label = "Projects: Localise & Unpack Lib Textures Externally"
@@ -3295,19 +3755,24 @@ class MATERIALLIST_OT_pack_textures_externally(bpy.types.Operator):
     bl_options = {'REGISTER'}
 
     wait: bpy.props.BoolProperty(
-        name="Wait for each worker to finish",
-        description="Block Blender UI until each file's processing completes (sequential). Uncheck for parallel background processing (faster, less direct feedback).",
+        name="Wait for workers to finish",
+        description="Block Blender UI until every file has been processed (up to 'Parallel Workers' at a time). Uncheck to launch all workers in the background (less direct feedback).",
         default=True
     )
+    max_workers: bpy.props.IntProperty(
+        name="Parallel Workers",
+        description="How many project files are processed at once while waiting",
+        default=max(1, (os.cpu_count() or 2) // 2), min=1, max=64
+    )
     
-    _processes: list = [] 
+    _processes: list = [] # (Popen, blend path) of no-wait workers still being watched by the reaper timer
 
     @classmethod
     def poll(cls, context):
-        if not DATABASE_FILE or not os.path.exists(DATABASE_FILE):
+        if not DATABASE_FILE or not _cached_exists(DATABASE_FILE):
             cls.poll_message_set("Addon database file not found.")
             return False
-        if not BACKGROUND_WORKER_PY or not os.path.exists(BACKGROUND_WORKER_PY): 
+        if not BACKGROUND_WORKER_PY or not _cached_exists(BACKGROUND_WORKER_PY): 
             cls.poll_message_set("Background worker script (BACKGROUND_WORKER_PY) not found.")
             return False
         # Ensure the path is not empty. The UI panel provides the string.
@@ -3330,6 +3795,8 @@ class MATERIALLIST_OT_pack_textures_externally(bpy.types.Operator):
         layout.separator()
         layout.label(text="This operation modifies original project files. Ensure backups exist.")
         layout.prop(self, "wait")
+        row = layout.row(); row.enabled = self.wait
+        row.prop(self, "max_workers")
 
     def execute(self, context):
         # Get the path directly from the scene property. This path is set by Blender's DIR_PATH selector.
@@ -3352,14 +3819,14 @@ class MATERIALLIST_OT_pack_textures_externally(bpy.types.Operator):
 
         blend_paths_from_db = set()
         try:
+            if not has_usage_table():
+                self.report({'ERROR'}, "Material usage table ('blend_material_usage') not found in database.")
+                return {'CANCELLED'}
             with get_db_connection() as conn:
                 c = conn.cursor()
-                c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='blend_material_usage'")
-                if c.fetchone() is None: 
-                    self.report({'ERROR'}, "Material usage table ('blend_material_usage') not found in database.")
-                    return {'CANCELLED'}
                 c.execute("SELECT DISTINCT blend_filepath FROM blend_material_usage")
-                blend_paths_from_db = {os.path.abspath(row[0]) for row in c.fetchall() if row[0] and os.path.isabs(row[0])}
+                # Rows are already absolute; normpath gives the same result as abspath without a getcwd per row
+                blend_paths_from_db = {os.path.normpath(row[0]) for row in c.fetchall() if row[0] and os.path.isabs(row[0])}
         except Exception as e: 
             self.report({'ERROR'}, f"Database error fetching file paths: {e}")
             traceback.print_exc()
@@ -3374,12 +3841,14 @@ class MATERIALLIST_OT_pack_textures_externally(bpy.types.Operator):
         skipped_non_existent = 0
         skipped_current_file = 0
 
+        existing_paths = _existing_paths(blend_paths_from_db)
+        current_blend_file_nc = os.path.normcase(current_blend_file_abs) if current_blend_file_abs else None
         for path_from_db in blend_paths_from_db:
-            if not os.path.exists(path_from_db):
+            if path_from_db not in existing_paths:
                 print(f"[PackExternal Op] INFO: Skipping non-existent path from DB: {path_from_db}")
                 skipped_non_existent += 1
                 continue
-            if current_blend_file_abs and os.path.normcase(path_from_db) == os.path.normcase(current_blend_file_abs):
+            if current_blend_file_nc and os.path.normcase(path_from_db) == current_blend_file_nc:
                 print(f"[PackExternal Op] INFO: Skipping currently open .blend file to avoid conflicts: {path_from_db}")
                 skipped_current_file += 1
                 continue
@@ -3398,71 +3867,52 @@ class MATERIALLIST_OT_pack_textures_externally(bpy.types.Operator):
         self.report({'INFO'}, f"Starting 'Pack to External' for {len(paths_to_process)} project files. Output path: '{external_output_path_for_worker}'.")
         print(f"[PackExternal Op] Will process {len(paths_to_process)} files. Output path for worker: '{external_output_path_for_worker}'")
 
-        MATERIALLIST_OT_pack_textures_externally._processes.clear()
         successful_launches_or_completions = 0
         failed_launches_or_completions = 0
         worker_script_path = BACKGROUND_WORKER_PY
 
-        for i, target_blend_abs_path in enumerate(paths_to_process):
+        # Only the target file varies per worker; everything around it is built once
+        argv_prefix = (bpy.app.binary_path, "--background", "--factory-startup")
+        argv_suffix = (
+            "--python", worker_script_path,
+            "--", 
+            "--operation", "pack_to_external",
+            # Pass the direct, un-sanitized (or correctly user-provided) path to the worker.
+            "--external-dir-name", external_output_path_for_worker, 
+            "--library-file", os.path.abspath(LIBRARY_FILE)
+        )
+        cmds_to_wait_for = {}
+        for target_blend_abs_path in paths_to_process:
+            cmd = [*argv_prefix, target_blend_abs_path, *argv_suffix]
             if self.wait:
-                self.report({'INFO'}, f"Processing file {i+1}/{len(paths_to_process)}: {os.path.basename(target_blend_abs_path)}")
-            
-            print(f"  [PackExternal Op] Launching worker for: {target_blend_abs_path}")
-
-            cmd = [
-                bpy.app.binary_path,
-                "--background",
-                "--factory-startup",
-                target_blend_abs_path, 
-                "--python", worker_script_path,
-                "--", 
-                "--operation", "pack_to_external",
-                # Pass the direct, un-sanitized (or correctly user-provided) path to the worker.
-                "--external-dir-name", external_output_path_for_worker, 
-                "--library-file", os.path.abspath(LIBRARY_FILE)
-            ]
+                cmds_to_wait_for[target_blend_abs_path] = cmd
+                continue
 
+            print(f"  [PackExternal Op] Launching worker for: {target_blend_abs_path}")
             try:
-                if self.wait:
-                    print(f"    Executing (wait): {' '.join(cmd)}")
-                    sys.stdout.flush() 
-                    sys.stderr.flush()
-                    
-                    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace')
-                    stdout_data, stderr_data = process.communicate(timeout=600) 
-
-                    print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' STDOUT:")
-                    for line in (stdout_data or "").splitlines(): print(f"      {line}") 
-                    sys.stdout.flush()
-                    print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' STDERR:")
-                    for line in (stderr_data or "").splitlines(): print(f"      {line}") 
-                    sys.stderr.flush()
-
-                    if process.returncode == 0:
-                        successful_launches_or_completions += 1
-                        print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' completed successfully.")
-                    else:
-                        failed_launches_or_completions += 1
-                        print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' FAILED with code {process.returncode}.")
-                else: 
-                    print(f"    Executing (no wait): {' '.join(cmd)}")
-                    sys.stdout.flush()
-                    sys.stderr.flush()
-                    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace')
-                    MATERIALLIST_OT_pack_textures_externally._processes.append(proc) 
-                    successful_launches_or_completions += 1 
-                    print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' launched (PID: {proc.pid}).")
-
-            except subprocess.TimeoutExpired:
-                failed_launches_or_completions +=1
-                print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' TIMED OUT after 600 seconds.")
-                if self.wait and 'process' in locals() and process.poll() is None: 
-                    try: process.kill(); process.wait(timeout=1) 
-                    except Exception: pass
+                if _DEBUG: print(f"    Executing (no wait): {' '.join(cmd)}")
+                # Output inherits Blender's console: these pipes were never read, so a chatty worker
+                # would fill the OS pipe buffer and stall
+                proc = subprocess.Popen(cmd)
+                MATERIALLIST_OT_pack_textures_externally._processes.append((proc, target_blend_abs_path))
+                successful_launches_or_completions += 1 
+                print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' launched (PID: {proc.pid}).")
             except Exception as e:
                 failed_launches_or_completions += 1
-                print(f"    ERROR launching/managing worker for '{os.path.basename(target_blend_abs_path)}': {e}")
-                traceback.print_exc()
+                print(f"    ERROR launching/managing worker for '{os.path.basename(target_blend_abs_path)}': {type(e).__name__}: {e}")
+                if _DEBUG: traceback.print_exc() # One line per failure by default; a bad binary path fails every file
+
+        if cmds_to_wait_for:
+            # Independent files: run them side by side instead of one 600 s slot after another.
+            # The worker's exists-then-save_render naming is not atomic, so two workers writing into the
+            # same folder can overwrite each other's textures; share a folder -> run one at a time.
+            max_workers = self.max_workers
+            if len(_unpack_dirs_by_blend(cmds_to_wait_for, external_output_path_for_worker)) < len(cmds_to_wait_for):
+                max_workers = 1
+                print("[PackExternal Op] Several files unpack into the same folder; running workers one at a time.")
+            print(f"[PackExternal Op] Running {len(cmds_to_wait_for)} workers, up to {max_workers} at a time...")
+            succeeded, failed = run_blend_workers_pooled(cmds_to_wait_for, max_workers)
+            successful_launches_or_completions += succeeded; failed_launches_or_completions += failed
         
         final_report_type = 'INFO'
         if failed_launches_or_completions > 0: final_report_type = 'WARNING'
@@ -3474,7 +3924,8 @@ class MATERIALLIST_OT_pack_textures_externally(bpy.types.Operator):
         self.report({final_report_type}, status_msg)
         print(f"[PackExternal Op] {status_msg}")
         if not self.wait and MATERIALLIST_OT_pack_textures_externally._processes: 
-             print(f"[PackExternal Op] {len(MATERIALLIST_OT_pack_textures_externally._processes)} workers launched in background. Check console for their individual outputs over time.")
+             print(f"[PackExternal Op] {len(MATERIALLIST_OT_pack_textures_externally._processes)} workers running in background. Check console for their individual outputs over time.")
+             _ensure_pack_worker_reaper()
         return {'FINISHED'}
 
 class MATERIALLIST_OT_pack_textures_internally(bpy.types.Operator):
@@ -3488,17 +3939,22 @@ class MATERIALLIST_OT_pack_textures_internally(bpy.types.Operator):
     bl_options = {'REGISTER'}
 
     wait: bpy.props.BoolProperty(
-        name="Wait for each worker to finish",
-        description="Block Blender UI until each file's processing completes (sequential). Uncheck for parallel background processing.",
+        name="Wait for workers to finish",
+        description="Block Blender UI until every file has been processed (up to 'Parallel Workers' at a time). Uncheck to launch all workers in the background.",
         default=True
     )
-    _processes: list = [] # Class variable to store non-waiting Popen objects
+    max_workers: bpy.props.IntProperty(
+        name="Parallel Workers",
+        description="How many project files are processed at once while waiting",
+        default=max(1, (os.cpu_count() or 2) // 2), min=1, max=64
+    )
+    _processes: list = [] # Class variable: (Popen, blend path) of no-wait workers still running
 
     @classmethod
     def poll(cls, context):
-        if not DATABASE_FILE or not os.path.exists(DATABASE_FILE): 
+        if not DATABASE_FILE or not _cached_exists(DATABASE_FILE): 
             cls.poll_message_set("Addon database file not found."); return False
-        if not BACKGROUND_WORKER_PY or not os.path.exists(BACKGROUND_WORKER_PY): # Ensure BACKGROUND_WORKER_PY is correct global
+        if not BACKGROUND_WORKER_PY or not _cached_exists(BACKGROUND_WORKER_PY): # Ensure BACKGROUND_WORKER_PY is correct global
             cls.poll_message_set("Background worker script (BACKGROUND_WORKER_PY) not found."); return False
         return True
 
@@ -3513,19 +3969,21 @@ class MATERIALLIST_OT_pack_textures_internally(bpy.types.Operator):
         layout.separator()
         layout.label(text="This operation modifies original project files. Ensure backups exist.")
         layout.prop(self, "wait")
+        row = layout.row(); row.enabled = self.wait
+        row.prop(self, "max_workers")
 
     def execute(self, context):
         print(f"[PackInternal Op] User confirmed.")
         blend_paths_from_db = set()
         try:
+            if not has_usage_table():
+                self.report({'ERROR'}, "Material usage table ('blend_material_usage') not found in database.")
+                return {'CANCELLED'}
             with get_db_connection() as conn: # Assumes get_db_connection is defined
                 c = conn.cursor()
-                c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='blend_material_usage'")
-                if c.fetchone() is None: 
-                    self.report({'ERROR'}, "Material usage table ('blend_material_usage') not found in database.")
-                    return {'CANCELLED'}
                 c.execute("SELECT DISTINCT blend_filepath FROM blend_material_usage")
-                blend_paths_from_db = {os.path.abspath(row[0]) for row in c.fetchall() if row[0] and os.path.isabs(row[0])}
+                # Rows are already absolute; normpath gives the same result as abspath without a getcwd per row
+                blend_paths_from_db = {os.path.normpath(row[0]) for row in c.fetchall() if row[0] and os.path.isabs(row[0])}
         except Exception as e: 
             self.report({'ERROR'}, f"Database error fetching file paths: {e}")
             traceback.print_exc()
@@ -3540,10 +3998,12 @@ class MATERIALLIST_OT_pack_textures_internally(bpy.types.Operator):
         skipped_non_existent = 0
         skipped_current_file = 0
 
+        existing_paths = _existing_paths(blend_paths_from_db)
+        current_blend_file_nc = os.path.normcase(current_blend_file_abs) if current_blend_file_abs else None
         for path_from_db in blend_paths_from_db:
-            if not os.path.exists(path_from_db):
+            if path_from_db not in existing_paths:
                 skipped_non_existent += 1; continue
-            if current_blend_file_abs and os.path.normcase(path_from_db) == os.path.normcase(current_blend_file_abs):
+            if current_blend_file_nc and os.path.normcase(path_from_db) == current_blend_file_nc:
                 skipped_current_file += 1; continue
             paths_to_process.append(path_from_db)
         
@@ -3553,65 +4013,35 @@ class MATERIALLIST_OT_pack_textures_internally(bpy.types.Operator):
 
         self.report({'INFO'}, f"Starting 'Pack Internally' for {len(paths_to_process)} files.")
         print(f"[PackInternal Op] Will process {len(paths_to_process)} files.")
-        MATERIALLIST_OT_pack_textures_internally._processes.clear() # Use correct class name
         successful_launches_or_completions, failed_launches_or_completions = 0, 0
         worker_script_path = BACKGROUND_WORKER_PY # Ensure this global is correctly set in register()
 
-        for i, target_blend_abs_path in enumerate(paths_to_process):
-            if self.wait: self.report({'INFO'}, f"Processing {i+1}/{len(paths_to_process)}: {os.path.basename(target_blend_abs_path)}")
+        argv_prefix = (bpy.app.binary_path, "--background", "--factory-startup")
+        argv_suffix = ("--python", worker_script_path, "--", "--operation", "pack_to_internal",
+                       "--library-file", os.path.abspath(LIBRARY_FILE))
+        cmds_to_wait_for = {}
+        for target_blend_abs_path in paths_to_process:
+            cmd = [*argv_prefix, target_blend_abs_path, *argv_suffix]
+            if self.wait:
+                cmds_to_wait_for[target_blend_abs_path] = cmd
+                continue
+
             print(f"  [PackInternal Op] Launching worker for: {target_blend_abs_path}")
-            cmd = [
-                bpy.app.binary_path,
-                "--background",
-                "--factory-startup",  # <--- ADDED THIS FLAG
-                target_blend_abs_path,
-                "--python", worker_script_path,
-                "--",
-                "--operation", "pack_to_internal",
-                "--library-file", os.path.abspath(LIBRARY_FILE)
-            ]
             try:
-                if self.wait:
-                    print(f"    Executing (wait): {' '.join(cmd)}")
-                    sys.stdout.flush()
-                    sys.stderr.flush()
-
-                    # Use Popen with communicate for waiting
-                    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace')
-                    stdout_data, stderr_data = process.communicate(timeout=600) # Wait for process to complete, 10 min timeout
-
-                    print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' STDOUT:")
-                    for line in (stdout_data or "").splitlines(): print(f"      {line}") # Add (or "") for safety
-                    sys.stdout.flush()
-                    print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' STDERR:")
-                    for line in (stderr_data or "").splitlines(): print(f"      {line}") # Add (or "") for safety
-                    sys.stderr.flush()
-                    
-                    if process.returncode == 0:
-                        successful_launches_or_completions += 1
-                        print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' completed successfully.")
-                    else:
-                        failed_launches_or_completions += 1
-                        print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' FAILED with code {process.returncode}.")
-                else: # Not waiting
-                    print(f"    Executing (no wait): {' '.join(cmd)}")
-                    sys.stdout.flush()
-                    sys.stderr.flush()
-                    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace')
-                    MATERIALLIST_OT_pack_textures_internally._processes.append(proc) # Use correct class name
-                    successful_launches_or_completions += 1
-                    print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' launched (PID: {proc.pid}).")
-
-            except subprocess.TimeoutExpired:
-                failed_launches_or_completions +=1
-                print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' TIMED OUT after 600 seconds.")
-                if self.wait and 'process' in locals() and process.poll() is None: # Ensure process exists and is running if Popen was used
-                    try: process.kill(); process.wait(timeout=1) # Clean up timed out process
-                    except Exception: pass
+                if _DEBUG: print(f"    Executing (no wait): {' '.join(cmd)}")
+                proc = subprocess.Popen(cmd) # Output goes straight to the console (pipes were never drained)
+                MATERIALLIST_OT_pack_textures_internally._processes.append((proc, target_blend_abs_path)) # Use correct class name
+                successful_launches_or_completions += 1
+                print(f"    Worker for '{os.path.basename(target_blend_abs_path)}' launched (PID: {proc.pid}).")
             except Exception as e:
                 failed_launches_or_completions += 1
-                print(f"    ERROR launching/managing worker for '{os.path.basename(target_blend_abs_path)}': {e}")
-                traceback.print_exc()
+                print(f"    ERROR launching/managing worker for '{os.path.basename(target_blend_abs_path)}': {type(e).__name__}: {e}")
+                if _DEBUG: traceback.print_exc() # One line per failure by default; a bad binary path fails every file
+
+        if cmds_to_wait_for:
+            print(f"[PackInternal Op] Running {len(cmds_to_wait_for)} workers, up to {self.max_workers} at a time...")
+            succeeded, failed = run_blend_workers_pooled(cmds_to_wait_for, self.max_workers)
+            successful_launches_or_completions += succeeded; failed_launches_or_completions += failed
         
         final_report_type = 'INFO'
         if failed_launches_or_completions > 0: final_report_type = 'WARNING'
@@ -3622,7 +4052,8 @@ class MATERIALLIST_OT_pack_textures_internally(bpy.types.Operator):
         self.report({final_report_type}, status_msg)
         print(f"[PackInternal Op] {status_msg}")
         if not self.wait and MATERIALLIST_OT_pack_textures_internally._processes: # Use correct class name
-             print(f"[PackInternal Op] Launched {len(MATERIALLIST_OT_pack_textures_internally._processes)} background workers. Check console for outputs.")
+             print(f"[PackInternal Op] {len(MATERIALLIST_OT_pack_textures_internally._processes)} background workers running. Check console for outputs.")
+             _ensure_pack_worker_reaper()
         return {'FINISHED'}
 
 class MATERIALLIST_OT_trim_library(bpy.types.Operator):
@@ -3686,35 +4117,38 @@ class MATERIALLIST_OT_trim_library(bpy.types.Operator):
         if not os.path.exists(LIBRARY_FILE):
             self.report({'INFO'}, "Central library file does not exist. Nothing to trim."); return {'FINISHED'}
 
-        temp_dir = tempfile.mkdtemp(prefix="lib_trim_")
-        temp_trimmed_lib_path = os.path.join(temp_dir, os.path.basename(LIBRARY_FILE))
+        # Temp file beside the library: same filesystem, so the final swap is an atomic rename, not copy+delete
+        temp_fd, temp_trimmed_lib_path = tempfile.mkstemp(prefix=".lib_trim_", suffix=".blend", dir=os.path.dirname(LIBRARY_FILE))
+        os.close(temp_fd)
         survivor_mats_for_write = set()
-        loaded_survivor_names_for_cleanup = []
+        loaded_survivor_mats_for_cleanup = []
 
         try:
+            # Appended, not linked: write() would store linked survivors as links back into the very
+            # file being replaced. Only the survivors are requested, so the load is O(kept), not O(library).
             with bpy.data.libraries.load(LIBRARY_FILE, link=False, assets_only=True) as (data_from, data_to):
                 if not hasattr(data_from, 'materials'):
-                    self.report({'INFO'}, "Library file contains no material data section."); shutil.rmtree(temp_dir); return {'FINISHED'}
+                    self.report({'INFO'}, "Library file contains no material data section."); return {'FINISHED'}
                 
                 initial_mat_count_in_lib = len(data_from.materials)
                 survivor_names_in_lib = [name for name in data_from.materials if name in to_keep_uuids]
-                
-                if survivor_names_in_lib:
-                    data_to.materials = survivor_names_in_lib
-                    loaded_survivor_names_for_cleanup.extend(survivor_names_in_lib) # For cleanup later
-                else:
-                    data_to.materials = []
+                nothing_to_trim = len(survivor_names_in_lib) == initial_mat_count_in_lib
+                # Reading data_from is just the name table; nothing is loaded unless data_to is filled
+                data_to.materials = [] if nothing_to_trim else survivor_names_in_lib
             
-            for mat_name_survivor in loaded_survivor_names_for_cleanup:
-                mat_obj = bpy.data.materials.get(mat_name_survivor)
-                if mat_obj and not mat_obj.library: # Is a local copy we just loaded
-                    mat_obj.use_fake_user = True
-                    survivor_mats_for_write.add(mat_obj)
+            if nothing_to_trim:
+                self.report({'INFO'}, f"Library holds {initial_mat_count_in_lib} materials, all recent. Nothing to trim.")
+                return {'FINISHED'} # finally below removes the unused temp file
+            
+            # data_to now holds the loaded datablocks themselves; looking them up by name could pick up a
+            # same-named material already in the session (the load would have renamed ours to .001)
+            loaded_survivor_mats_for_cleanup = [m for m in data_to.materials if m is not None]
+            survivor_mats_for_write = set(loaded_survivor_mats_for_cleanup)
             
             print(f"[Trim Library Op] Writing {len(survivor_mats_for_write)} survivors to temp: {temp_trimmed_lib_path}")
-            bpy.data.libraries.write(temp_trimmed_lib_path, survivor_mats_for_write, fake_user=True, compress=True)
+            bpy.data.libraries.write(temp_trimmed_lib_path, survivor_mats_for_write, fake_user=True, compress=True) # fake_user applies in the written file
             
-            shutil.move(temp_trimmed_lib_path, LIBRARY_FILE)
+            os.replace(temp_trimmed_lib_path, LIBRARY_FILE)
             temp_trimmed_lib_path = None # Mark as moved
 
             removed_actual = initial_mat_count_in_lib - len(survivor_mats_for_write)
@@ -3724,17 +4158,13 @@ class MATERIALLIST_OT_trim_library(bpy.types.Operator):
             self.report({'ERROR'}, f"Error during library trim: {str(e_trim_main)}"); traceback.print_exc(); return {'CANCELLED'}
         finally:
             # Cleanup materials loaded into current session for the operation
-            for name in loaded_survivor_names_for_cleanup:
-                mat = bpy.data.materials.get(name)
-                if mat and not mat.library and mat.users == 0 : # Only if it has no users after our write
-                    try: bpy.data.materials.remove(mat)
-                    except Exception: pass # Ignore if removal fails (e.g. still has users)
+            to_remove = [mat for mat in loaded_survivor_mats_for_cleanup if mat.users == 0] # Only if it has no users after our write
+            if to_remove:
+                try: bpy.data.batch_remove(ids=to_remove) # Single ID-remap pass instead of one per material
+                except Exception: pass # Ignore if removal fails
             
             if temp_trimmed_lib_path and os.path.exists(temp_trimmed_lib_path):
-                try: os.remove(temp_trimmed_lib_path) # If move failed
-                except Exception: pass
-            if os.path.exists(temp_dir):
-                try: shutil.rmtree(temp_dir)
+                try: os.remove(temp_trimmed_lib_path) # Not swapped in (early return or failure)
                 except Exception: pass
         
         populate_material_list(context.scene) # Assuming this function exists
@@ -3764,66 +4194,33 @@ class MATERIALLIST_OT_select_dominant(Operator):
             self.report({'WARNING'}, "Object has no materials.")
             return {'CANCELLED'}
 
-        counts = {}
-        faces_to_consider = []
         is_edit_mode_with_selection = False
 
         if ob.mode == 'EDIT':
+            # Edit-mode data lives in the BMesh (mesh.polygons is stale until mode exit)
             bm = bmesh.from_edit_mesh(me)
-            bm.faces.ensure_lookup_table() # Ensure indices are up to date
-            selected_faces = [f for f in bm.faces if f.select]
-            if selected_faces:
+            face_slots = [f.material_index for f in bm.faces if f.select]
+            if face_slots:
                 is_edit_mode_with_selection = True
-                faces_to_consider = selected_faces
-                # print(f"[Select Dominant] Edit Mode: Found {len(selected_faces)} selected faces.")
             else:
                 # No faces selected in Edit Mode, consider all faces
-                faces_to_consider = list(bm.faces) # Make a copy
-                # print(f"[Select Dominant] Edit Mode: No faces selected, considering all {len(faces_to_consider)} faces.")
-            # We don't free bm here if selected_faces were used, as they are references.
-            # If we made a copy for all faces, bm can be freed earlier if we are done with it.
-            # However, for simplicity, let's free it after counts are gathered.
+                face_slots = [f.material_index for f in bm.faces]
+            face_slots = np.array(face_slots, dtype=np.int32)
         else: # Object Mode
-            # print(f"[Select Dominant] Object Mode: Will consider all faces.")
-            # Create a temporary BMesh to access face data
-            bm = bmesh.new()
-            bm.from_mesh(me)
-            bm.faces.ensure_lookup_table()
-            faces_to_consider = list(bm.faces) # Make a copy
-            # bm.free() # Free immediately if created just for this block
-
-        if not faces_to_consider:
+            # One bulk copy of every face's slot index; no temporary BMesh of the whole mesh
+            face_slots = np.empty(len(me.polygons), dtype=np.int32)
+            me.polygons.foreach_get("material_index", face_slots)
+
+        if not face_slots.size:
             if is_edit_mode_with_selection:
                 self.report({'WARNING'}, "No faces are selected.")
             else:
                 self.report({'WARNING'}, "Object has no faces to analyze.")
-            if ob.mode == 'OBJECT' and 'bm' in locals() and bm.is_wrapped: # Check if bm exists and is valid from Object mode
-                 bm.free()
-            elif ob.mode == 'EDIT' and 'bm' in locals(): # For edit mode, bmesh.from_edit_mesh does not need explicit free
-                pass
-            return {'CANCELLED'}
-
-        for f in faces_to_consider:
-            counts[f.material_index] = counts.get(f.material_index, 0) + 1
-
-        # Free BMesh if it was created (Object Mode) or if from_edit_mesh was used (Edit Mode)
-        if 'bm' in locals():
-            if bm.is_wrapped: # True if created by bmesh.new()
-                bm.free()
-            # else: bmesh.from_edit_mesh() doesn't need explicit free, changes are written back or discarded by Blender
-
-        if not counts:
-            if is_edit_mode_with_selection:
-                self.report({'WARNING'}, "Selected faces have no material assignments, or materials are invalid.")
-            else:
-                self.report({'WARNING'}, "No material assignments found on object faces.")
             return {'CANCELLED'}
 
-        try:
-            dominant_idx = max(counts, key=counts.get)
-        except ValueError: # Should not happen if counts is not empty
-            self.report({'WARNING'}, "Could not determine dominant material index.")
-            return {'CANCELLED'}
+        # Histogram of slot usage in C; argmax picks the most used slot (lowest index on ties)
+        counts = np.bincount(face_slots, minlength=len(me.materials))
+        dominant_idx = int(counts.argmax())
 
         if not (0 <= dominant_idx < len(me.materials)):
             self.report({'WARNING'}, f"Dominant material index {dominant_idx} is out of bounds for material slots.")
@@ -3839,12 +4236,10 @@ class MATERIALLIST_OT_select_dominant(Operator):
             self.report({'WARNING'}, f"Could not get UUID for dominant material '{dominant_mat.name}'.")
             return {'CANCELLED'}
 
-        found_in_list = False
-        for i, itm in enumerate(scene.material_list_items):
-            if itm.material_uuid == dominant_uuid:
-                scene.material_list_active_index = i
-                found_in_list = True
-                break
+        dominant_idx = find_list_index_by_uuid(scene, dominant_uuid)
+        found_in_list = dominant_idx != -1
+        if found_in_list:
+            scene.material_list_active_index = dominant_idx
         
         if found_in_list:
             mode_info = "selected faces" if is_edit_mode_with_selection else "object"
@@ -3860,6 +4255,60 @@ class MATERIALLIST_OT_select_dominant(Operator):
 # --------------------------
 # Scene Thumbnail Functions (Updated for robustness)
 # --------------------------
+_icon_template_verify_cache = {'stamp': None, 'ok': False} # Scene check result for the template file as of stamp
+
+def _icon_template_has_scene(scene_name="IconTemplateScene"):
+    """
+    True if ICON_TEMPLATE_FILE contains `scene_name`. The file is only opened when its (mtime, size)
+    differs from the last check, so repeat calls cost a single stat. Load errors propagate.
+    """
+    stamp = _library_file_stamp(ICON_TEMPLATE_FILE)
+    if stamp is None:
+        return False
+    if _icon_template_verify_cache['stamp'] == stamp:
+        return _icon_template_verify_cache['ok']
+    # assets_only=False for robust scene name checking; data_from.scenes is a list of scene names
+    with bpy.data.libraries.load(ICON_TEMPLATE_FILE, link=False, assets_only=False) as (data_from, _):
+        scene_names_in_template = list(getattr(data_from, "scenes", []))
+    ok = scene_name in scene_names_in_template
+    if not ok:
+        print(f"[IconTemplate] Scene '{scene_name}' not found in template. Found: {scene_names_in_template}")
+    _icon_template_verify_cache['stamp'] = stamp; _icon_template_verify_cache['ok'] = ok
+    return ok
+
+def _build_template_sphere(u_segments=32, v_segments=16, radius=0.8):
+    """
+    Icon preview sphere in from_pydata form: the same layout as bmesh.ops.create_uvsphere
+    (poles on Z, triangle fans at the poles, quads between rings, outward winding) plus
+    spherical UVs for every loop, flattened in the loop order from_pydata produces.
+    """
+    verts = [(0.0, 0.0, radius)]
+    for ring_idx in range(1, v_segments):
+        theta = math.pi * ring_idx / v_segments
+        ring_radius, z = radius * math.sin(theta), radius * math.cos(theta)
+        for seg_idx in range(u_segments):
+            phi = 2 * math.pi * seg_idx / u_segments
+            verts.append((ring_radius * math.cos(phi), ring_radius * math.sin(phi), z))
+    verts.append((0.0, 0.0, -radius))
+    bottom_idx = len(verts) - 1
+    ring_vert = lambda ring_idx, seg_idx: 1 + ring_idx * u_segments + seg_idx % u_segments
+
+    faces = [(0, ring_vert(0, j), ring_vert(0, j + 1)) for j in range(u_segments)]
+    for ring_idx in range(v_segments - 2):
+        faces.extend((ring_vert(ring_idx, j), ring_vert(ring_idx + 1, j), ring_vert(ring_idx + 1, j + 1), ring_vert(ring_idx, j + 1))
+                     for j in range(u_segments))
+    faces.extend((bottom_idx, ring_vert(v_segments - 2, j + 1), ring_vert(v_segments - 2, j)) for j in range(u_segments))
+
+    loop_co = np.array(verts, dtype=np.float32)[[v for face in faces for v in face]]
+    loop_co /= np.linalg.norm(loop_co, axis=1, keepdims=True)
+    loop_uv = np.empty((len(loop_co), 2), dtype=np.float32)
+    loop_uv[:, 0] = np.arctan2(loop_co[:, 1], loop_co[:, 0]) / (2 * math.pi) + 0.5
+    loop_uv[:, 1] = np.arcsin(np.clip(loop_co[:, 2], -1.0, 1.0)) / math.pi + 0.5
+    return verts, faces, loop_uv.ravel()
+
+# Fixed geometry, built once at import; template rebuilds only copy it into a new mesh
+_TEMPLATE_SPHERE_VERTS, _TEMPLATE_SPHERE_FACES, _TEMPLATE_SPHERE_UVS = _build_template_sphere()
+
 def ensure_icon_template():
     """
     Ensure that the icon template blend file exists on disk.
@@ -3871,17 +4320,9 @@ def ensure_icon_template():
 
     if os.path.exists(ICON_TEMPLATE_FILE):
         try:
-            print(f"[IconTemplate Ensure - QuickVerify] Checking existing template '{ICON_TEMPLATE_FILE}' for scene '{template_scene_name_in_file}'.")
-            # MODIFIED: Use assets_only=False for robust scene name checking
-            with bpy.data.libraries.load(ICON_TEMPLATE_FILE, link=False, assets_only=False) as (data_from, _):
-                # When assets_only=False and link=False, data_from.scenes is a list of scene names.
-                available_scene_names = list(getattr(data_from, "scenes", []))
-                print(f"[IconTemplate Ensure - QuickVerify] Scene names found in existing template (assets_only=False): {available_scene_names}")
-                if template_scene_name_in_file in available_scene_names:
-                    print(f"[IconTemplate Ensure - QuickVerify] SUCCESS: Scene '{template_scene_name_in_file}' found. Template is OK.")
-                    return True
-                else:
-                    print(f"[IconTemplate Ensure - QuickVerify] FAILURE: Scene '{template_scene_name_in_file}' NOT found. Rebuilding.")
+            if _icon_template_has_scene(template_scene_name_in_file): # Cached per file mtime/size
+                return True
+            print(f"[IconTemplate Ensure - QuickVerify] FAILURE: Scene '{template_scene_name_in_file}' NOT found. Rebuilding.")
         except Exception as e_quick_verify:
             print(f"[IconTemplate Ensure - QuickVerify] ERROR quick-verifying existing template '{ICON_TEMPLATE_FILE}': {e_quick_verify}. Rebuilding.")
             traceback.print_exc()
@@ -3904,71 +4345,63 @@ def ensure_icon_template():
     light_obj_name = "IconTemplateLight"
     light_data_name = "IconTemplateLight_Data"
 
-    temp_setup_scene_name = f"IconTemplate_TEMP_SETUP_{str(uuid.uuid4())[:8]}"
+    temp_setup_scene_name = f"IconTemplate_TEMP_SETUP_{secrets.token_hex(4)}"
     temp_setup_scene = None
+    temp_blend_path = None
     scene_to_save_in_template = None # Will be defined by the inserted snippet
     created_data_blocks_for_template_file = []  # Store references to all created data
 
     try:
         # --- BEGIN CRITICAL PRE-CLEANUP of conflicting datablocks ---
+        # Collect everything first and drop it in one batch_remove pass instead of one remove() per datablock
+        to_remove = set()
+        cleanup_log = [] # Pre-cleanup notes, printed in one call below; errors still print directly
         for obj_name_to_clear in [preview_obj_name, camera_obj_name, light_obj_name]:
-            if obj_name_to_clear in bpy.data.objects:
-                obj_to_remove = bpy.data.objects[obj_name_to_clear]
-                print(f"[IconTemplate Ensure] Pre-cleanup: Removing existing object '{obj_name_to_clear}'.")
-                try:
-                    # Ensure no users before removing data if this object is the only user
-                    if obj_to_remove.data and obj_to_remove.data.users == 1:
-                        data_to_remove_internally = obj_to_remove.data
-                        obj_to_remove.data = None # Unlink data from object
-                        if data_to_remove_internally.name in bpy.data.meshes or \
-                           data_to_remove_internally.name in bpy.data.cameras or \
-                           data_to_remove_internally.name in bpy.data.lights:
-                            if isinstance(data_to_remove_internally, bpy.types.Mesh) and data_to_remove_internally.name in bpy.data.meshes:
-                                bpy.data.meshes.remove(data_to_remove_internally)
-                            elif isinstance(data_to_remove_internally, bpy.types.Camera) and data_to_remove_internally.name in bpy.data.cameras:
-                                bpy.data.cameras.remove(data_to_remove_internally)
-                            elif isinstance(data_to_remove_internally, bpy.types.Light) and data_to_remove_internally.name in bpy.data.lights:
-                                bpy.data.lights.remove(data_to_remove_internally)
-                    bpy.data.objects.remove(obj_to_remove, do_unlink=True)
-                except Exception as e:
-                    print(f"[IconTemplate Ensure] Error pre-cleaning object '{obj_name_to_clear}': {e}")
+            obj_to_remove = bpy.data.objects.get(obj_name_to_clear)
+            if obj_to_remove is not None:
+                cleanup_log.append(f"[IconTemplate Ensure] Pre-cleanup: Removing existing object '{obj_name_to_clear}'.")
+                to_remove.add(obj_to_remove)
+                # The object's data goes with it if the object is its only user
+                if obj_to_remove.data and obj_to_remove.data.users == 1:
+                    to_remove.add(obj_to_remove.data)
 
         for data_name_to_clear, data_collection in [
             (preview_mesh_data_name, bpy.data.meshes),
             (camera_data_name, bpy.data.cameras),
             (light_data_name, bpy.data.lights)
         ]:
-            if data_name_to_clear in data_collection:
-                data_block_to_remove = data_collection[data_name_to_clear]
-                if data_block_to_remove.users == 0:
-                    print(f"[IconTemplate Ensure] Pre-cleanup: Removing existing data block '{data_name_to_clear}' (0 users).")
-                    try:
-                        data_collection.remove(data_block_to_remove)
-                    except Exception as e:
-                        print(f"[IconTemplate Ensure] Error pre-cleaning data '{data_name_to_clear}': {e}")
-                else:
-                    print(f"[IconTemplate Ensure] Pre-cleanup: Data block '{data_name_to_clear}' has users ({data_block_to_remove.users}), cannot remove directly. Will be handled by object removal if sole user.")
+            data_block_to_remove = data_collection.get(data_name_to_clear)
+            if data_block_to_remove is None or data_block_to_remove in to_remove:
+                continue
+            if data_block_to_remove.users == 0:
+                cleanup_log.append(f"[IconTemplate Ensure] Pre-cleanup: Removing existing data block '{data_name_to_clear}' (0 users).")
+                to_remove.add(data_block_to_remove)
+            else:
+                cleanup_log.append(f"[IconTemplate Ensure] Pre-cleanup: Data block '{data_name_to_clear}' has users ({data_block_to_remove.users}), cannot remove directly. Will be handled by object removal if sole user.")
 
-        scene_to_remove_name_check = template_scene_name_in_file
-        while scene_to_remove_name_check in bpy.data.scenes:
-            scene_obj_to_remove = bpy.data.scenes[scene_to_remove_name_check]
-            print(f"[IconTemplate Ensure] Pre-cleanup: Attempting to remove existing scene '{scene_obj_to_remove.name}'. Target name for template is '{template_scene_name_in_file}'.")
-            active_scene_switched = False
+        scene_obj_to_remove = bpy.data.scenes.get(template_scene_name_in_file)
+        if scene_obj_to_remove is not None:
+            cleanup_log.append(f"[IconTemplate Ensure] Pre-cleanup: Attempting to remove existing scene '{scene_obj_to_remove.name}'. Target name for template is '{template_scene_name_in_file}'.")
+            other_scene_to_activate = None # Looked up once, only if some window actually shows the doomed scene
             for window_iter in bpy.context.window_manager.windows:
                 if window_iter.scene == scene_obj_to_remove:
-                    other_scene_to_activate = next((s for s in bpy.data.scenes if s != scene_obj_to_remove), None)
+                    if other_scene_to_activate is None:
+                        other_scene_to_activate = next((s for s in bpy.data.scenes if s != scene_obj_to_remove), None)
                     if other_scene_to_activate:
                         window_iter.scene = other_scene_to_activate
-                        active_scene_switched = True
-                        print(f"[IconTemplate Ensure]   Switched window '{window_iter}' to scene '{other_scene_to_activate.name}'.")
+                        cleanup_log.append(f"[IconTemplate Ensure]   Switched window '{window_iter}' to scene '{other_scene_to_activate.name}'.")
                     else:
-                        print(f"[IconTemplate Ensure]   Warning: Cannot switch window '{window_iter}' from scene '{scene_obj_to_remove.name}', no other scene available yet.")
+                        cleanup_log.append(f"[IconTemplate Ensure]   Warning: Cannot switch window '{window_iter}' from scene '{scene_obj_to_remove.name}', no other scene available yet.")
+            to_remove.add(scene_obj_to_remove)
+
+        if cleanup_log:
+            print("\n".join(cleanup_log))
+        if to_remove:
             try:
-                bpy.data.scenes.remove(scene_obj_to_remove)
-                print(f"[IconTemplate Ensure]   Pre-cleanup: Successfully removed scene '{scene_to_remove_name_check}'.")
-            except Exception as e_remove_scene_robust:
-                print(f"[IconTemplate Ensure]   Error during pre-cleanup of scene '{scene_to_remove_name_check}': {e_remove_scene_robust}. Template creation may result in a suffixed scene name.")
-                break # Avoid infinite loop if removal fails
+                bpy.data.batch_remove(ids=to_remove)
+                print(f"[IconTemplate Ensure] Pre-cleanup: Removed {len(to_remove)} conflicting datablock(s).")
+            except Exception as e_batch_remove:
+                print(f"[IconTemplate Ensure] Error during pre-cleanup batch removal: {e_batch_remove}. Template creation may result in a suffixed scene name.")
 
         # --- END CRITICAL PRE-CLEANUP ---
 
@@ -3980,20 +4413,10 @@ def ensure_icon_template():
         # --- START OF USER'S PROVIDED SNIPPET ---
         # Create data blocks (mesh, camera, light) as before
         mesh_data = bpy.data.meshes.new(preview_mesh_data_name)
-        bm = bmesh.new()
-        bmesh.ops.create_uvsphere(bm, u_segments=32, v_segments=16, radius=0.8)
-        uv_layer = bm.loops.layers.uv.verify() or bm.loops.layers.uv.new("UVMap")
-        if uv_layer:
-            for face in bm.faces:
-                for loop in face.loops:
-                    loop_uv = loop[uv_layer]
-                    norm_co = loop.vert.co.normalized()
-                    loop_uv.uv = (
-                        (math.atan2(norm_co.y, norm_co.x) / (2 * math.pi)) + 0.5,
-                        (math.asin(norm_co.z) / math.pi) + 0.5
-                    )
-        bm.to_mesh(mesh_data)
-        bm.free()
+        # Precomputed sphere (see _build_template_sphere): no bmesh round-trip per rebuild
+        mesh_data.from_pydata(_TEMPLATE_SPHERE_VERTS, [], _TEMPLATE_SPHERE_FACES)
+        mesh_data.update()
+        mesh_data.uv_layers.new(name="UVMap").data.foreach_set("uv", _TEMPLATE_SPHERE_UVS)
         created_data_blocks_for_template_file.append(mesh_data)
 
         cam_data = bpy.data.cameras.new(camera_data_name)
@@ -4090,63 +4513,60 @@ def ensure_icon_template():
         # created_data_blocks_for_template_file.append(scene_to_save_in_template)
         # created_data_blocks_for_template_file.append(scene_to_save_in_template.collection)
 
-        temp_dir_for_blend_save = tempfile.mkdtemp(prefix="icon_template_blend_")
-        temp_blend_path = os.path.join(temp_dir_for_blend_save, os.path.basename(ICON_TEMPLATE_FILE))
-
-        valid_blocks_to_write = set()
-        for block in created_data_blocks_for_template_file:
-            if block and hasattr(block, 'name') and block.name:
-                valid_blocks_to_write.add(block)
-            else:
-                print(f"[IconTemplate Ensure] Warning: Skipping invalid/unnamed block for write: {block} (Type: {type(block)})")
-
-        if not valid_blocks_to_write:
-            print("[IconTemplate Ensure] CRITICAL: No valid data blocks collected for writing to template.")
-            raise RuntimeError("No valid data blocks for template file.")
-
-        print(f"[IconTemplate Ensure] Writing {len(valid_blocks_to_write)} blocks (incl. scene '{scene_to_save_in_template.name}') to temp .blend: {temp_blend_path}")
-        # for block_to_log in sorted(list(valid_blocks_to_write), key=lambda b: b.name if hasattr(b,'name') and b.name else str(type(b))):
-        #     print(f"  Preparing to write block: {getattr(block_to_log, 'name', 'UnnamedBlock')} (Type: {type(block_to_log)})")
+        # Temp file next to the template so the final os.replace is a same-device rename, never a copy
+        os.makedirs(os.path.dirname(ICON_TEMPLATE_FILE), exist_ok=True)
+        temp_fd, temp_blend_path = tempfile.mkstemp(prefix=".icon_template_", suffix=".blend", dir=os.path.dirname(ICON_TEMPLATE_FILE))
+        os.close(temp_fd)
 
-        bpy.data.libraries.write(temp_blend_path, {scene_to_save_in_template}, fake_user=True, compress=True)
+        # Only the scene is passed; libraries.write pulls in its collection, objects, mesh, camera and light.
+        # created_data_blocks_for_template_file is kept purely for the failure cleanup below.
+        print(f"[IconTemplate Ensure] Writing scene '{scene_to_save_in_template.name}' and its dependencies to temp .blend: {temp_blend_path}")
+        bpy.data.libraries.write(temp_blend_path, {scene_to_save_in_template}, compress=False) # Small file, read often: skip zlib both ways
 
         # --- IMMEDIATE VERIFICATION of the temporary .blend file ---
-        print(f"[IconTemplate Ensure - PostWriteVerify] Verifying temporary template file: {temp_blend_path}")
-        has_scene_in_temp_file = False
-        try:
-            # MODIFIED: Use assets_only=False for robust scene name checking
-            with bpy.data.libraries.load(temp_blend_path, link=False, assets_only=False) as (data_from_temp_check, _):
-                # When assets_only=False and link=False, data_from.scenes is a list of scene names.
-                available_scenes_in_temp_names = list(getattr(data_from_temp_check, "scenes", []))
-                print(f"[IconTemplate Ensure - PostWriteVerify (assets_only=False)] Available scene names in temp file: {available_scenes_in_temp_names}")
-                if template_scene_name_in_file in available_scenes_in_temp_names:
-                    has_scene_in_temp_file = True
-                    print(f"[IconTemplate Ensure - PostWriteVerify (assets_only=False)]   SUCCESS: Temporary template file '{os.path.basename(temp_blend_path)}' lists scene '{template_scene_name_in_file}'.")
-                else:
-                    print(f"[IconTemplate Ensure - PostWriteVerify (assets_only=False)]   FAILURE: Temporary template file '{os.path.basename(temp_blend_path)}' DOES NOT list scene '{template_scene_name_in_file}'.")
-        except Exception as e_verify_temp_file:
-            print(f"[IconTemplate Ensure - PostWriteVerify (assets_only=False)]   ERROR during verification of temporary template file: {e_verify_temp_file}")
-            traceback.print_exc()
-
-        if not has_scene_in_temp_file:
-            print("[IconTemplate Ensure] CRITICAL POST-WRITE FAILURE: The temporary template .blend file is invalid (missing target scene). Aborting template finalization.")# Cleanup the temp directory
-            if os.path.exists(temp_dir_for_blend_save):
-                shutil.rmtree(temp_dir_for_blend_save, ignore_errors=True)
-            # No need to clean up session datablocks here as the main exception handler will do it.
+        # The scene was built in-process under the checked name, so a non-trivial file size catches a failed write;
+        # the full re-load that lists the file's scenes only runs with DEBUG_VERIFY_TEMPLATE
+        temp_blend_stat = _stat_or_none(temp_blend_path)
+        if temp_blend_stat is None or temp_blend_stat.st_size < 1024:
+            print(f"[IconTemplate Ensure - PostWriteVerify] FAILURE: Temporary template file '{temp_blend_path}' is missing or truncated.")
             raise RuntimeError("Failed to write a valid temporary template file.")
+        if DEBUG_VERIFY_TEMPLATE:
+            print(f"[IconTemplate Ensure - PostWriteVerify] Verifying temporary template file: {temp_blend_path}")
+            has_scene_in_temp_file = False
+            try:
+                # MODIFIED: Use assets_only=False for robust scene name checking
+                with bpy.data.libraries.load(temp_blend_path, link=False, assets_only=False) as (data_from_temp_check, _):
+                    # When assets_only=False and link=False, data_from.scenes is a list of scene names.
+                    available_scenes_in_temp_names = list(getattr(data_from_temp_check, "scenes", []))
+                    print(f"[IconTemplate Ensure - PostWriteVerify (assets_only=False)] Available scene names in temp file: {available_scenes_in_temp_names}")
+                    if template_scene_name_in_file in available_scenes_in_temp_names:
+                        has_scene_in_temp_file = True
+                        print(f"[IconTemplate Ensure - PostWriteVerify (assets_only=False)]   SUCCESS: Temporary template file '{os.path.basename(temp_blend_path)}' lists scene '{template_scene_name_in_file}'.")
+                    else:
+                        print(f"[IconTemplate Ensure - PostWriteVerify (assets_only=False)]   FAILURE: Temporary template file '{os.path.basename(temp_blend_path)}' DOES NOT list scene '{template_scene_name_in_file}'.")
+            except Exception as e_verify_temp_file:
+                print(f"[IconTemplate Ensure - PostWriteVerify (assets_only=False)]   ERROR during verification of temporary template file: {e_verify_temp_file}")
+                traceback.print_exc()
+
+            if not has_scene_in_temp_file:
+                print("[IconTemplate Ensure] CRITICAL POST-WRITE FAILURE: The temporary template .blend file is invalid (missing target scene). Aborting template finalization.")
+                # No need to clean up the temp file or session datablocks here as the main exception handler will do it.
+                raise RuntimeError("Failed to write a valid temporary template file.")
         # --- END IMMEDIATE VERIFICATION ---
 
-        os.makedirs(os.path.dirname(ICON_TEMPLATE_FILE), exist_ok=True)
-        shutil.move(temp_blend_path, ICON_TEMPLATE_FILE)
+        os.replace(temp_blend_path, ICON_TEMPLATE_FILE)
+        temp_blend_path = None
         print(f"[IconTemplate Ensure] Template file created successfully and verified: {ICON_TEMPLATE_FILE}")
-
-        if os.path.exists(temp_dir_for_blend_save): # Should be empty now if move succeeded
-            shutil.rmtree(temp_dir_for_blend_save, ignore_errors=True)
+        # Just verified above (as the temp file); record it so the next check is a stat, not a load
+        _icon_template_verify_cache['stamp'] = _library_file_stamp(ICON_TEMPLATE_FILE); _icon_template_verify_cache['ok'] = True
         return True
 
     except Exception as e:
         print(f"[IconTemplate Ensure] CRITICAL ERROR during template file creation: {e}")
         traceback.print_exc()
+        if temp_blend_path and os.path.exists(temp_blend_path): # Write or verify failed before the replace
+            try: os.unlink(temp_blend_path)
+            except Exception as e_unlink_temp: print(f"[IconTemplate Ensure] Could not remove temp template file '{temp_blend_path}': {e_unlink_temp}")
         # Cleanup of data blocks created in *this attempt* if an error occurred
         print("[IconTemplate Ensure] Cleaning up data blocks created in this failed attempt...")
         for block in reversed(created_data_blocks_for_template_file): # Reverse order for dependencies
@@ -4197,75 +4617,68 @@ def ensure_icon_template():
                 print(f"[IconTemplate Ensure] Error cleaning up temporary setup scene '{temp_setup_scene_name}': {e_clean_setup}")
 
 def force_update_preview(mat):
+    # Diagnostics (and the RNA reads that only feed them) run with _DEBUG; errors are always printed
     if not mat:
-        print(f"FUP: Material object is None. Cannot update preview.") # FUP for ForceUpdatePreview
+        if _DEBUG: print(f"FUP: Material object is None. Cannot update preview.") # FUP for ForceUpdatePreview
         return
 
-    # Determine material properties for logging before any operations
-    mat_name_for_log = "UnknownMaterial"
     try:
-        mat_name_for_log = mat.name
+        is_lib = mat.library is not None # Explicit boolean check
     except ReferenceError: # Material might have been deleted
-        print(f"FUP: Material '{mat_name_for_log}' (ref error) is invalid. Cannot update preview.")
+        if _DEBUG: print(f"FUP: Material (ref error) is invalid. Cannot update preview.")
         return
 
-    is_lib = mat.library is not None # Explicit boolean check
-    library_filepath_for_log = "N/A"
-    if is_lib and mat.library: # Ensure mat.library itself isn't None before accessing filepath
-        library_filepath_for_log = getattr(mat.library, 'filepath', 'N/A (Library object has no filepath attr)')
-
-    print(f"FUP: Called for '{mat_name_for_log}'. Is Library: {is_lib}. Lib File: {library_filepath_for_log}")
+    if _DEBUG:
+        library_filepath_for_log = getattr(mat.library, 'filepath', 'N/A (Library object has no filepath attr)') if is_lib else "N/A"
+        print(f"FUP: Called for '{mat.name}'. Is Library: {is_lib}. Lib File: {library_filepath_for_log}")
 
     try:
         if not is_lib:
-            print(f"FUP: Path for LOCAL material '{mat_name_for_log}'. Attempting to reset preview.")
+            if _DEBUG: print(f"FUP: Path for LOCAL material '{mat.name}'. Attempting to reset preview.")
             # For local materials, we can try to force a preview refresh
             mat.preview = None # This line is suspected if the error occurs for a material that IS a library type
 
             if hasattr(mat, "preview_render_type"):
+                # Toggle and restore in place: each type change + preview_ensure tags a refresh, no timer round-trip
                 current_type = mat.preview_render_type
-                # print(f"FUP: Local mat '{mat_name_for_log}' - current preview_render_type: {current_type}")
                 mat.preview_render_type = 'FLAT'
-                # print(f"FUP: Local mat '{mat_name_for_log}' - set preview_render_type to FLAT")
-                # Schedule restoration back to original, which triggers another refresh
-                bpy.app.timers.register(lambda: restore_render_type(mat, current_type), first_interval=0.05)
+                mat.preview_ensure()
+                mat.preview_render_type = current_type
+                mat.preview_ensure()
             else:
-                # print(f"FUP: Local mat '{mat_name_for_log}' - calling preview_ensure() as fallback.")
                 mat.preview_ensure() # Fallback if preview_render_type not available
-            print(f"FUP: Local material '{mat_name_for_log}' preview reset/ensure called.")
+            if _DEBUG: print(f"FUP: Local material '{mat.name}' preview reset/ensure called.")
 
         elif is_lib: # Explicitly elif for library materials
             if hasattr(mat, 'preview_ensure'):
-                print(f"FUP: Path for LIBRARY material '{mat_name_for_log}'. Calling preview_ensure().")
+                if _DEBUG: print(f"FUP: Path for LIBRARY material '{mat.name}'. Calling preview_ensure().")
                 mat.preview_ensure()
             else: # Should not happen for valid materials
-                print(f"FUP: LIBRARY material '{mat_name_for_log}' does not have preview_ensure attribute.")
+                print(f"FUP: LIBRARY material '{mat.name}' does not have preview_ensure attribute.")
 
         # No else needed, covers both cases.
 
     except ReferenceError: # Catch if 'mat' becomes invalid during processing
-        print(f"FUP: ERROR - ReferenceError for '{mat_name_for_log}' during preview update. Material may have been removed.")
+        print(f"FUP: ERROR - ReferenceError during preview update. Material may have been removed.")
     except Exception as e:
         # This is the crucial error log
+        try: mat_name_for_log = mat.name
+        except ReferenceError: mat_name_for_log = "UnknownMaterial"
         print(f"FUP: ERROR for '{mat_name_for_log}' (Is Library: {is_lib}): {e}")
         # traceback.print_exc() # Keep traceback commented unless specifically needed for very deep errors
 
-def restore_render_type(mat, original_type): # Unchanged
-    try:
-        mat.preview_render_type = original_type; mat.preview_ensure()
-    except Exception as e: print(f"Error restoring render type for {mat.name}: {e}")
+@functools.lru_cache(maxsize=4096) # Cleared by save_material_group_cache, the only writer of `groups`
+def _query_library_uuid_for_hash(hash_val: str) -> str | None:
+    # DB errors propagate so lru_cache never memoizes a failed lookup as "no row"
+    with get_db_connection() as conn:
+        # `groups` is created by initialize_database, so no sqlite_master probe per call
+        result = conn.execute("SELECT library_uuid FROM groups WHERE hash = ? LIMIT 1", (hash_val,)).fetchone()
+    if result and result[0] and isinstance(result[0], str) and len(result[0]) == 36: return result[0]
     return None
 
-def get_library_uuid_for_hash(hash_val: str) -> str | None: # Unchanged
+def get_library_uuid_for_hash(hash_val: str) -> str | None:
     if not hash_val: return None
-    try:
-        with get_db_connection() as conn:
-            c = conn.cursor()
-            c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='groups'")
-            if c.fetchone() is None: return None
-            c.execute("SELECT library_uuid FROM groups WHERE hash = ? LIMIT 1", (hash_val,))
-            result = c.fetchone()
-            if result and result[0] and isinstance(result[0], str) and len(result[0]) == 36: return result[0]
+    try: return _query_library_uuid_for_hash(hash_val)
     except Exception as e: print(f"Error querying library_uuid for hash {hash_val}: {e}")
     return None
 
@@ -4273,38 +4686,97 @@ def get_library_uuid_for_hash(hash_val: str) -> str | None: # Unchanged
 # Thumbnail Path Management (Unchanged)
 # --------------------------
 def get_thumbnail_path(hash_value): return os.path.join(THUMBNAIL_FOLDER, f"{hash_value}.png")
-def find_legacy_thumbnail_path(hash_value): # Unchanged
-    if not os.path.isdir(THUMBNAIL_FOLDER): return None # Added check
-    for filename in os.listdir(THUMBNAIL_FOLDER):
-        if filename.endswith(f"_{hash_value}.png"): return os.path.join(THUMBNAIL_FOLDER, filename)
-    return None
+
+def _stat_or_none(path):
+    """os.stat(path), or None if it cannot be stat'ed (treated as missing)."""
+    try: return os.stat(path)
+    except OSError: return None
+
+_stat_cache = {} # path -> (generation, monotonic time, stat result or None) for thumbnail file checks
+_stat_cache_generation = 0 # Bumped by each process_thumbnail_tasks tick, which also empties _stat_cache
+
+def cached_stat(path):
+    """_stat_or_none(path), reused within one thumbnail tick and for at most PATH_EXISTS_TTL seconds."""
+    entry = _stat_cache.get(path)
+    now = time.monotonic()
+    if entry is not None and entry[0] == _stat_cache_generation and now - entry[1] < PATH_EXISTS_TTL:
+        return entry[2]
+    st = _stat_or_none(path)
+    _stat_cache[path] = (_stat_cache_generation, now, st)
+    return st
+
+def _bump_stat_cache_generation():
+    global _stat_cache_generation
+    _stat_cache_generation += 1
+    _stat_cache.clear()
+
+def _png_dims(path):
+    """(width, height) from a PNG's IHDR chunk, or None if the file can't be read or isn't a PNG."""
+    try:
+        with open(path, 'rb') as f:
+            hdr = f.read(24)
+    except OSError:
+        return None
+    if len(hdr) < 24 or hdr[:8] != b'\x89PNG\r\n\x1a\n':
+        return None
+    return struct.unpack('>II', hdr[16:24])
+
+def _is_nonempty_file(path):
+    """isfile + getsize > 0 from a single (cached) stat."""
+    st = cached_stat(path)
+    return st is not None and stat.S_ISREG(st.st_mode) and st.st_size > 0
+_legacy_thumb_index = None # {hash: legacy thumbnail path}, built on first lookup; None = rebuild
+
+def find_legacy_thumbnail_path(hash_value):
+    global _legacy_thumb_index
+    if _legacy_thumb_index is None:
+        if not os.path.isdir(THUMBNAIL_FOLDER): return None # Added check
+        # One directory listing for all lookups instead of one per call
+        _legacy_thumb_index = {}
+        for filename in os.listdir(THUMBNAIL_FOLDER):
+            legacy_match = _LEGACY_THUMBNAIL_PATTERN.match(filename)
+            if legacy_match: _legacy_thumb_index[legacy_match.group(1)] = os.path.join(THUMBNAIL_FOLDER, filename)
+    return _legacy_thumb_index.get(hash_value)
 
 # --------------------------
 # Thumbnail Migration Handler (Unchanged)
 # --------------------------
 @persistent
 def migrate_thumbnail_files(dummy): # Unchanged in core logic, just uses pre-compiled regex
-    global THUMBNAIL_FOLDER # Ensure THUMBNAIL_FOLDER is accessible
+    global THUMBNAIL_FOLDER, _legacy_thumb_index # Ensure THUMBNAIL_FOLDER is accessible
     # _LEGACY_THUMBNAIL_PATTERN is now a global, no need to define 'legacy_pattern' locally
 
     if not os.path.exists(THUMBNAIL_FOLDER): return
+    # Legacy names are never produced any more, so one clean pass per thumbnail folder is enough
+    migration_marker = os.path.join(THUMBNAIL_FOLDER, ".legacy_migration_done")
+    if os.path.exists(migration_marker): return
     migrated_count = 0
     # Local 'legacy_pattern' variable is removed
     try:
-        for filename in os.listdir(THUMBNAIL_FOLDER):
-            src_path = os.path.join(THUMBNAIL_FOLDER, filename)
-            # Use the pre-compiled global pattern here
-            if not _LEGACY_THUMBNAIL_PATTERN.match(filename): continue # MODIFIED LINE
-            hash_value = filename.split("_")[1].split(".")[0]
-            dest_path = get_thumbnail_path(hash_value) # Assumes get_thumbnail_path is defined
-            if not os.path.exists(dest_path): os.rename(src_path, dest_path); migrated_count += 1
-            else: os.remove(src_path) # Remove duplicate legacy
+        with os.scandir(THUMBNAIL_FOLDER) as entries: # Streamed; no full name list up front
+            for entry in entries:
+                filename = entry.name
+                # Cheap gate before the regex: "<prefix>_<32 hex>.png" has '_' exactly 37 chars from the end
+                if len(filename) < 38 or filename[-37] != '_' or filename[-4:].lower() != '.png': continue
+                legacy_match = _LEGACY_THUMBNAIL_PATTERN.match(filename)
+                if not legacy_match: continue
+                src_path = entry.path
+                hash_value = legacy_match.group(1)
+                dest_path = get_thumbnail_path(hash_value) # Assumes get_thumbnail_path is defined
+                if not os.path.exists(dest_path): os.rename(src_path, dest_path); migrated_count += 1
+                else: os.remove(src_path) # Remove duplicate legacy
+                _legacy_thumb_index = None # Legacy files moved; rebuild the index on next lookup
+        open(migration_marker, 'w').close() # Only after a full pass; an error leaves it unset so the next load retries
     except Exception as e: print(f"Thumbnail Migration Error: {str(e)}"); traceback.print_exc()
     # print(f"Thumbnail Migration: {migrated_count} files migrated.") # Optional log
 
 # --------------------------
 # Thumbnail Generation Core Logic (get_custom_icon, generate_thumbnail_async, update_material_thumbnails)
 # --------------------------
+def _icon_hash_key(mat):
+    """Key for _icon_hash_cache; the pointer guards against a different datablock reusing a freed material's name."""
+    return (mat.name_full, mat.as_pointer())
+
 def get_custom_icon(mat, collect_mode=False):
     """
     [CORRECTED v4] Gets a custom icon, or prepares a task if one is needed.
@@ -4312,15 +4784,20 @@ def get_custom_icon(mat, collect_mode=False):
     to prevent the infinite re-queuing of tasks during a single run.
     """
     global custom_icons
-    global g_current_run_task_hashes_being_processed, _ICON_TEMPLATE_VALIDATED
+    global g_current_run_task_hashes_being_processed, _ICON_TEMPLATE_VALIDATED, _icon_template_unavailable
 
     if not mat:
         return 0
 
     # --- Hashing and Initial "In-Flight" Check ---
-    current_material_hash = get_material_hash(mat)
-    if not current_material_hash:
-        return 0
+    # Full recipe hash only when the material is new or was edited since the last draw
+    icon_hash_key = _icon_hash_key(mat)
+    current_material_hash = _icon_hash_cache.get(icon_hash_key)
+    if current_material_hash is None:
+        current_material_hash = get_material_hash(mat)
+        if not current_material_hash:
+            return 0
+        _icon_hash_cache[icon_hash_key] = current_material_hash
 
     # -------------------------------------------------------------------
     # --- THIS IS THE CRITICAL FIX TO PREVENT THE INFINITE LOOP ---
@@ -4340,39 +4817,62 @@ def get_custom_icon(mat, collect_mode=False):
     # Check 1: Blender's internal preview cache (fastest)
     if current_material_hash in custom_icons:
         cached_preview_item = custom_icons[current_material_hash]
+        if current_material_hash in _known_good_icons: # Size already validated; it does not change once loaded
+            _touch_loaded_icon(current_material_hash)
+            return cached_preview_item.icon_id
         if hasattr(cached_preview_item, 'icon_id') and cached_preview_item.icon_id > 0:
             if cached_preview_item.icon_size[0] > 1:
+                _known_good_icons.add(current_material_hash)
+                _touch_loaded_icon(current_material_hash)
                 return cached_preview_item.icon_id
             else:
+                _known_good_icons.discard(current_material_hash)
+                _thumb_mtime_cache.pop(current_material_hash, None)
                 del custom_icons[current_material_hash] # Corrupt cache entry
 
     # Check 2: If a valid file already exists on disk
     thumbnail_file_path = get_thumbnail_path(current_material_hash)
-    if os.path.isfile(thumbnail_file_path) and os.path.getsize(thumbnail_file_path) > 0:
+    thumb_dims = _png_dims(thumbnail_file_path) if _is_nonempty_file(thumbnail_file_path) else None
+    if thumb_dims is not None and min(thumb_dims) <= 1: # Degenerate image: drop it without a preview load
+        try: os.remove(thumbnail_file_path)
+        except OSError: pass
+        _stat_cache.pop(thumbnail_file_path, None)
+    elif _is_nonempty_file(thumbnail_file_path):
         try:
             preview_item_from_disk = custom_icons.load(current_material_hash, thumbnail_file_path, 'IMAGE')
             if preview_item_from_disk.icon_size[0] > 1:
+                _thumb_mtime_cache[current_material_hash] = cached_stat(thumbnail_file_path).st_mtime_ns
+                _touch_loaded_icon(current_material_hash)
                 return preview_item_from_disk.icon_id
             else: # Corrupt file on disk
+                _known_good_icons.discard(current_material_hash)
+                _thumb_mtime_cache.pop(current_material_hash, None)
                 del custom_icons[current_material_hash]
                 os.remove(thumbnail_file_path)
+                _stat_cache.pop(thumbnail_file_path, None)
         except (RuntimeError, OSError, Exception):
             pass # Problem loading the file, fall through to regenerate
 
     # --- If we reach here, a thumbnail must be generated ---
     if not _ICON_TEMPLATE_VALIDATED:
-        if not _verify_icon_template(): return 0
+        if _icon_template_unavailable: return 0 # Already failed this run; don't retry the rebuild per material
+        if not _verify_icon_template():
+            _icon_template_unavailable = True
+            return 0
         _ICON_TEMPLATE_VALIDATED = True
 
     blend_file_path_for_worker = None
-    if mat.library and mat.library.filepath:
-        blend_file_path_for_worker = bpy.path.abspath(mat.library.filepath)
-    elif not mat.library and bpy.data.filepath:
+    mat_library = mat.library # Each RNA property read once for the rest of task prep
+    if mat_library:
+        library_filepath = mat_library.filepath
+        if library_filepath:
+            blend_file_path_for_worker = bpy.path.abspath(library_filepath)
+    elif bpy.data.filepath:
         blend_file_path_for_worker = bpy.path.abspath(bpy.data.filepath)
     else:
         return 0 # Cannot process local material in an unsaved file
 
-    if not blend_file_path_for_worker or not os.path.exists(blend_file_path_for_worker):
+    if not blend_file_path_for_worker or not _cached_exists(blend_file_path_for_worker): # Same few .blend paths every redraw
         return 0
 
     mat_uuid_for_task = get_material_uuid(mat)
@@ -4406,21 +4906,8 @@ def _verify_icon_template() -> bool:
     """
     template_scene_name = "IconTemplateScene"
     try:
-        need_rebuild = False
-
-        if not os.path.exists(ICON_TEMPLATE_FILE):
-            need_rebuild = True
-        else:
-            # MODIFIED: Use assets_only=False for robust scene name checking
-            with bpy.data.libraries.load(ICON_TEMPLATE_FILE, link=False, assets_only=False) as (data_from, _):
-                # When assets_only=False and link=False, data_from.scenes is a list of scene names.
-                scene_names_in_template = list(getattr(data_from, "scenes", []))
-                if template_scene_name not in scene_names_in_template:
-                    print(f"[_verify_icon_template] Scene '{template_scene_name}' not found via assets_only=False. Found: {scene_names_in_template}. Rebuilding.")
-                    need_rebuild = True
-                # else: # Optional: log success if found
-                #     print(f"[_verify_icon_template] Scene '{template_scene_name}' found via assets_only=False. Template is OK.")
-
+        # Missing file and missing scene both come back False; a known-good unchanged file costs one stat
+        need_rebuild = not _icon_template_has_scene(template_scene_name)
 
         if need_rebuild:
             print("[ThumbMan] Icon-template missing or empty (or specific scene not found) – rebuilding …")
@@ -4441,49 +4928,59 @@ def _queue_all_pending_tasks(single_task_list=None):
     global g_tasks_for_current_run, thumbnail_task_queue, g_dispatch_lock
     global g_outstanding_task_count, _ADDON_DATA_ROOT, THUMBNAIL_SIZE
 
+    # The lock only guards swapping g_tasks_for_current_run; grouping (exists() I/O) and the
+    # thread-safe Queue.put below run outside it
     with g_dispatch_lock:
-        tasks_to_process = single_task_list if single_task_list is not None else g_tasks_for_current_run
-        if not tasks_to_process:
-            return
+        if single_task_list is not None:
+            tasks_to_process = single_task_list
+        else:
+            tasks_to_process, g_tasks_for_current_run = g_tasks_for_current_run, []
+    if not tasks_to_process:
+        return
 
-        tasks_by_blend_file = {}
-        for task in tasks_to_process:
-            blend_file = task.get('blend_file')
-            if blend_file and os.path.exists(blend_file):
-                if blend_file not in tasks_by_blend_file:
-                    tasks_by_blend_file[blend_file] = []
-                tasks_by_blend_file[blend_file].append(task)
-        
-        if not tasks_by_blend_file:
-            if single_task_list is None: g_tasks_for_current_run.clear()
-            return
+    tasks_by_blend_file = defaultdict(list)
+    blend_file_exists = {} # One exists() per distinct .blend, not per task
+    for task in tasks_to_process:
+        blend_file = task.get('blend_file')
+        if not blend_file:
+            continue
+        exists = blend_file_exists.get(blend_file)
+        if exists is None:
+            exists = blend_file_exists[blend_file] = os.path.exists(blend_file)
+        if exists:
+            tasks_by_blend_file[blend_file].append(task)
 
-        blend_file_to_process_now = next(iter(tasks_by_blend_file))
-        tasks_for_this_file = tasks_by_blend_file.pop(blend_file_to_process_now)
-        
-        remaining_tasks = []
-        for remaining_list in tasks_by_blend_file.values():
-            remaining_tasks.extend(remaining_list)
-        g_tasks_for_current_run = remaining_tasks
+    if not tasks_by_blend_file:
+        return
 
-        batches_created, tasks_queued = 0, 0
-        
-        for i in range(0, len(tasks_for_this_file), THUMBNAIL_BATCH_SIZE_PER_WORKER):
-            batch = tasks_for_this_file[i:i + THUMBNAIL_BATCH_SIZE_PER_WORKER]
-            thumbnail_task_queue.put({
-                "tasks": batch, "blend_file": blend_file_to_process_now,
-                "addon_data_root": _ADDON_DATA_ROOT, "size": THUMBNAIL_SIZE
-            })
-            batches_created += 1
-            tasks_queued += len(batch)
-        
-        g_outstanding_task_count += tasks_queued
+    blend_file_to_process_now = next(iter(tasks_by_blend_file))
+    tasks_for_this_file = tasks_by_blend_file.pop(blend_file_to_process_now)
 
-        if batches_created > 0:
-            print(f"[_queue_all_pending_tasks] Queued {tasks_queued} tasks for '{os.path.basename(blend_file_to_process_now)}'.")
-            if g_tasks_for_current_run:
-                print(f"  {len(g_tasks_for_current_run)} tasks for other files are pending.")
-                
+    remaining_tasks = []
+    for remaining_list in tasks_by_blend_file.values():
+        remaining_tasks.extend(remaining_list)
+    if remaining_tasks:
+        with g_dispatch_lock: # Keep anything (e.g. retries) added while we were grouping
+            g_tasks_for_current_run = remaining_tasks + g_tasks_for_current_run
+
+    batches_created, tasks_queued = 0, 0
+    
+    for i in range(0, len(tasks_for_this_file), THUMBNAIL_BATCH_SIZE_PER_WORKER):
+        batch = tasks_for_this_file[i:i + THUMBNAIL_BATCH_SIZE_PER_WORKER]
+        thumbnail_task_queue.put({
+            "tasks": batch, "blend_file": blend_file_to_process_now,
+            "addon_data_root": _ADDON_DATA_ROOT, "size": THUMBNAIL_SIZE
+        })
+        batches_created += 1
+        tasks_queued += len(batch)
+    
+    g_outstanding_task_count += tasks_queued
+
+    if _DEBUG and batches_created > 0: # Per collected task during a scan, so trace-only
+        print(f"[_queue_all_pending_tasks] Queued {tasks_queued} tasks for '{os.path.basename(blend_file_to_process_now)}'.")
+        if g_tasks_for_current_run:
+            print(f"  {len(g_tasks_for_current_run)} tasks for other files are pending.")
+            
 def finalize_thumbnail_run():
     """
     [IMPROVED] Finalizes a thumbnail run cleanly.
@@ -4541,9 +5038,8 @@ def _handle_worker_result(result_data):
 def _handle_worker_exit(manager_id):
     """ Callback to safely remove a finished/crashed worker manager from the pool. """
     print(f"[WorkerManager-{manager_id}] has exited. Removing from pool.")
-    global g_worker_manager_pool
-    # This list comprehension is a thread-safe way to rebuild the list
-    g_worker_manager_pool = [m for m in g_worker_manager_pool if m.id != manager_id]
+    # Runs on the manager's I/O thread: a single dict.pop, so a worker added meanwhile by the timer is never dropped
+    g_worker_manager_pool.pop(manager_id, None)
 
 # --- REPLACEMENT for process_thumbnail_tasks ---
 def process_thumbnail_tasks():
@@ -4561,15 +5057,19 @@ def process_thumbnail_tasks():
     global list_version, g_thumbnails_loaded_in_current_UMT_run, g_tasks_for_current_run
     global g_current_run_task_hashes_being_processed, custom_icons, THUMBNAIL_MAX_RETRIES
 
+    _bump_stat_cache_generation() # Workers may have written thumbnails since the last tick
+
     # --- Section 1: Cleanup and Global Shutdown Check ---
     # First, remove any workers that may have crashed or exited from the pool.
-    g_worker_manager_pool = [m for m in g_worker_manager_pool if m.is_alive()]
+    for manager_id, manager in list(g_worker_manager_pool.items()): # Snapshot; exit callbacks pop concurrently
+        if not manager.is_alive():
+            g_worker_manager_pool.pop(manager_id, None)
 
     # If the global "job in progress" flag is false, the only goal is to shut down.
     if not g_thumbnail_process_ongoing:
         if g_worker_manager_pool:
             # If workers are still running, signal them to stop and check back soon.
-            for manager in g_worker_manager_pool:
+            for manager in list(g_worker_manager_pool.values()):
                 manager.stop_async()
             return 0.1  # Continue timer to give workers time to shut down.
         else:
@@ -4603,7 +5103,7 @@ def process_thumbnail_tasks():
             if not manager.is_running:
                 print("[Thumb Timer] Failed to start a new worker, will retry.", file=sys.stderr)
                 break
-            g_worker_manager_pool.append(manager)
+            g_worker_manager_pool[manager.id] = manager
             
             # Immediately try to give the new worker a task.
             try:
@@ -4613,7 +5113,7 @@ def process_thumbnail_tasks():
     
     # Distribute any remaining tasks to already-running workers that are now idle.
     if not thumbnail_task_queue.empty():
-        for manager in g_worker_manager_pool:
+        for manager in list(g_worker_manager_pool.values()):
             if manager.task_queue.qsize() == 0:  # Check if the worker's personal queue is empty.
                 try:
                     manager.add_task(thumbnail_task_queue.get_nowait())
@@ -4637,12 +5137,22 @@ def process_thumbnail_tasks():
                 result = results_map.get(h)
                 if result and result.get('status') == 'success':
                     thumb_path = task['thumb_path']
-                    if os.path.isfile(thumb_path) and os.path.getsize(thumb_path) > 0:
+                    thumb_dims = _png_dims(thumb_path) if _is_nonempty_file(thumb_path) else None
+                    if thumb_dims is not None and min(thumb_dims) <= 1:
+                        pass # Degenerate image from the worker: not loaded, falls through to the retry logic
+                    elif _is_nonempty_file(thumb_path):
                         try:
-                            if h in custom_icons:
-                                del custom_icons[h]
-                            custom_icons.load(h, thumb_path, 'IMAGE')
+                            thumb_mtime_ns = cached_stat(thumb_path).st_mtime_ns
+                            if h in custom_icons and h in _known_good_icons and _thumb_mtime_cache.get(h) == thumb_mtime_ns:
+                                pass # Loaded preview already reflects this exact file; skip the free + reload
+                            else:
+                                if h in custom_icons:
+                                    _known_good_icons.discard(h)
+                                    del custom_icons[h]
+                                custom_icons.load(h, thumb_path, 'IMAGE')
+                                _thumb_mtime_cache[h] = thumb_mtime_ns
                             if custom_icons.get(h) and custom_icons[h].icon_size[0] > 1:
+                                _touch_loaded_icon(h)
                                 is_successful = True
                                 g_thumbnails_loaded_in_current_UMT_run = True
                                 list_version += 1
@@ -4789,7 +5299,6 @@ def create_reference_snapshot(context: bpy.types.Context) -> bool:
 
         # 5) Join all duplicates into one mesh
         try:
-            bpy.ops.object.select_all(action='DESELECT')
             valid_for_join = [
                 dup for dup in duplicates_refs
                 if dup and dup.name in context.view_layer.objects
@@ -4802,12 +5311,16 @@ def create_reference_snapshot(context: bpy.types.Context) -> bool:
                         bpy.data.objects.remove(obj_rm, do_unlink=True)
                 return False
 
-            for dup in valid_for_join:
-                dup.select_set(True)
-            context.view_layer.objects.active = valid_for_join[0]
-            bpy.ops.object.join()
+            # Hand join its inputs through a context override rather than rewriting the
+            # selection (deselect-all + select_set per duplicate tags the depsgraph each time
+            # and discards the user's selection).
+            join_target = valid_for_join[0]
+            with context.temp_override(active_object=join_target, object=join_target,
+                                       selected_objects=valid_for_join,
+                                       selected_editable_objects=valid_for_join):
+                bpy.ops.object.join()
 
-            joined_obj = context.active_object
+            joined_obj = join_target
             joined_obj.name = f"REF_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
         except Exception as e_join:
@@ -4890,18 +5403,96 @@ def create_reference_snapshot(context: bpy.types.Context) -> bool:
 def depsgraph_update_handler(scene, depsgraph):
     """
     ULTRA-LIGHTWEIGHT: Only detects if a material has changed.
-    It does NOT iterate or do any work. It just sets a single boolean flag.
+    Sets a single boolean flag and drops the edited materials' cached icon hashes.
     """
     global g_materials_are_dirty, g_used_uuids_dirty
-    # If the dirty flag is already set, we don't need to check further.
-    if g_materials_are_dirty:
+    # If the dirty flag is already set and no icon hashes are cached, we don't need to check further.
+    if g_materials_are_dirty and not _icon_hash_cache:
         return
 
     for update in depsgraph.updates:
         if isinstance(update.id, bpy.types.Material):
             g_materials_are_dirty = True
-            # No need to check for object updates here for this specific optimization
-            break # Exit early once a material change is found
+            if not _icon_hash_cache:
+                break # Exit early once a material change is found
+            _icon_hash_cache.pop(_icon_hash_key(update.id.original), None)
+        elif _icon_hash_cache and isinstance(update.id, (bpy.types.Image, bpy.types.NodeTree, bpy.types.Texture)):
+            # Images and node groups feed the hash of every material using them, without a Material update;
+            # which materials those are is unknown here, so drop every cached hash
+            _icon_hash_cache.clear()
+            if g_materials_are_dirty:
+                break
+
+@persistent
+def icon_hash_cache_undo_handler(scene):
+    """Undo/redo restores material contents without per-material depsgraph updates; drop every cached icon hash."""
+    _icon_hash_cache.clear()
+
+def _mat_slot_signature(slots):
+    """Per-slot 'mat_' material name (None otherwise), the shape reference_backup stores.
+    Reads .material and .name once per slot."""
+    signature = []
+    for slot in slots:
+        mat = slot.material
+        name = mat.name if mat else None
+        signature.append(name if name and name[:4] == "mat_" else None)
+    return signature
+
+def _reference_slots_changed(obj):
+    """True if a mesh object's 'mat_' slot layout no longer matches its reference backup."""
+    slots = obj.material_slots
+    slot_count = len(slots)
+    if slot_count == 0:
+        return False
+    ref_backup_slots = reference_backup.get(obj.name)
+    if ref_backup_slots is None:
+        return any(m is not None for m in _mat_slot_signature(slots))
+    if slot_count != len(ref_backup_slots):
+        return True # No need to read any slot names
+    return _mat_slot_signature(slots) != ref_backup_slots
+
+def _switch_to_editing_mode():
+    global _pending_editing_switch_scene
+    scene_name, _pending_editing_switch_scene = _pending_editing_switch_scene, None
+    scene = bpy.data.scenes.get(scene_name) if scene_name else None
+    if scene and scene.workspace_mode == 'REFERENCE':
+        scene.workspace_mode = 'EDITING'
+    return None
+
+@persistent
+def reference_slot_change_handler(scene, depsgraph):
+    """
+    Leaves Reference mode as soon as a mesh's 'mat_' slots diverge from the reference backup.
+    Event-driven replacement for the old 1.5s modal poll: only objects the depsgraph
+    reports as updated are compared, and nothing runs outside Reference mode.
+    """
+    global _pending_editing_switch_scene
+    if not scene or getattr(scene, 'workspace_mode', None) != 'REFERENCE':
+        return
+    updated_objects = []
+    updated_meshes = set()
+    for update in depsgraph.updates:
+        id_orig = getattr(update.id, 'original', update.id)
+        if isinstance(id_orig, bpy.types.Object):
+            if id_orig.type == 'MESH':
+                updated_objects.append(id_orig)
+        elif isinstance(id_orig, bpy.types.Mesh):
+            updated_meshes.add(id_orig.name)
+    if updated_meshes and not updated_objects:
+        # Slots written on the mesh itself tag only the mesh; resolve its objects
+        updated_objects = [obj for obj in scene.objects
+                           if obj.type == 'MESH' and obj.data and obj.data.name in updated_meshes]
+    for obj in updated_objects:
+        try:
+            if _reference_slots_changed(obj):
+                print(f"[MaterialList] Slot change detected in '{obj.name}'. Switching to EDITING mode.")
+                # Property writes (and the mode switch's own update callback) are not safe mid-depsgraph-update
+                _pending_editing_switch_scene = scene.name
+                if not bpy.app.timers.is_registered(_switch_to_editing_mode):
+                    bpy.app.timers.register(_switch_to_editing_mode, first_interval=0.0)
+                return
+        except ReferenceError:
+            continue
 
 # --------------------------
 # Property Update Callbacks and UI Redraw (from old addon)
@@ -5057,7 +5648,7 @@ class PersistentWorkerManager:
         self.main_thread = None
         self.on_result = on_result_callback
         self.on_exit = on_exit_callback
-        self.id = str(uuid.uuid4())[:8]
+        self.id = secrets.token_hex(4) # Short log tag only
         self.is_stopping = False
 
     def start(self):
@@ -5142,7 +5733,7 @@ class PersistentWorkerManager:
         line = line.strip()
         if line and line.startswith('{'):
             try:
-                result_data = json.loads(line)
+                result_data = _json_loads(line)
                 self.on_result(result_data)
             except json.JSONDecodeError:
                 print(f"[Worker-{self.id} STDOUT non-JSON]: {line}", file=sys.stderr)
@@ -5351,7 +5942,10 @@ class MATERIALLIST_PT_panel(bpy.types.Panel): # Ensure bpy.types.Panel is inheri
             # Duplicate‐name warning
             name_to_check = item.original_name
             if name_to_check and not name_to_check.startswith("mat_") and name_to_check != "Material":
-                count = sum(1 for li in scene.material_list_items if li.original_name == name_to_check)
+                if _list_original_name_counts:
+                    count = _list_original_name_counts.get(name_to_check, 0)
+                else: # Not built yet for this session
+                    count = sum(1 for li in scene.material_list_items if li.original_name == name_to_check)
                 if count > 1:
                     warn_box = info_parent.box(); warn_box.alert = True
                     warn_box.label(text=f"'{name_to_check}' used by {count} materials!", icon='ERROR')
@@ -5406,7 +6000,6 @@ classes = (
     MATERIALLIST_OT_refresh_material_list,
     MATERIALLIST_OT_sort_alphabetically,
     MATERIALLIST_OT_scroll_to_top,
-    MATERIALLIST_OT_PollMaterialChanges,
     MATERIALLIST_OT_integrate_library,
     MATERIALLIST_OT_pack_library_textures,
     MATERIALLIST_OT_run_localisation_worker,
@@ -5472,6 +6065,9 @@ handler_pairs = [
     (bpy.app.handlers.save_pre, save_pre_handler), # <-- CHANGE THIS LINE
     (bpy.app.handlers.save_post, save_post_handler),
     (bpy.app.handlers.depsgraph_update_post, depsgraph_update_handler),
+    (bpy.app.handlers.depsgraph_update_post, reference_slot_change_handler),
+    (bpy.app.handlers.undo_post, icon_hash_cache_undo_handler),
+    (bpy.app.handlers.redo_post, icon_hash_cache_undo_handler),
     (bpy.app.handlers.load_post, migrate_thumbnail_files)
 ]
 
@@ -5517,13 +6113,7 @@ def deferred_safe_init():
             reference_backup.clear()
             backup_current_assignments(reference_backup, 'reference')
             load_backups() # Load any persisted backups for the current file
-
-            # Start polling for material changes if the operator exists
-            if hasattr(bpy.ops.materiallist, 'poll_material_changes'):
-                try:
-                    bpy.ops.materiallist.poll_material_changes('INVOKE_DEFAULT')
-                except Exception as op_error:
-                    print(f"Error invoking poll_material_changes: {op_error}")
+            # Reference-mode slot changes are picked up by reference_slot_change_handler
 
         # Initialize material properties (UUIDs, datablock names for local non-"mat_" materials)
         # This is crucial after initial file load and potential linking of library materials.
@@ -5550,7 +6140,7 @@ def register():
     global custom_icons
     global BACKGROUND_WORKER_PY, MAX_CONCURRENT_THUMBNAIL_WORKERS, THUMBNAIL_BATCH_SIZE_PER_WORKER
     global material_names, material_hashes, global_hash_cache, list_version, _display_name_cache, _display_name_cache_version
-    global thumbnail_task_queue, thumbnail_generation_scheduled, thumbnail_pending_on_disk_check
+    global thumbnail_task_queue, thumbnail_pending_on_disk_check
     global thumbnail_worker_pool, thumbnail_monitor_timer_active, persistent_icon_template_scene
     global is_update_processing, library_update_queue, material_list_cache
     global db_connections 
@@ -5565,7 +6155,6 @@ def register():
 
     # --- Forceful Reset of Global State Variables ---
     thumbnail_task_queue = Queue() 
-    thumbnail_generation_scheduled = {}
     thumbnail_pending_on_disk_check = {}
     thumbnail_worker_pool = []      
     thumbnail_monitor_timer_active = False
@@ -5715,17 +6304,11 @@ def register():
         print("[Register] initialize_db_connection_pool function not found.", file=sys.stderr)
 
 
-    # print("[Register] Step 9: Preloading existing thumbnails...")
-    if custom_icons is not None and 'preload_existing_thumbnails' in globals() and callable(preload_existing_thumbnails):
-        try:
-            preload_existing_thumbnails()
-        except Exception as e_preload:
-            print(f"[Register] Error during preload_existing_thumbnails: {e_preload}", file=sys.stderr)
-            traceback.print_exc(file=sys.stderr)
-    elif custom_icons is None:
-        print("[Register] Skipping thumbnail preload: custom_icons collection is not available.", file=sys.stderr)
-    else: 
-        print("[Register] preload_existing_thumbnails function not found.", file=sys.stderr)
+    # Step 9 (thumbnail preload) removed: previews are loaded per hash on first draw by get_custom_icon,
+    # so startup no longer scales with the number of thumbnails on disk.
+    _loaded_icon_lru.clear()
+    _known_good_icons.clear()
+    _thumb_mtime_cache.clear()
 
 
     # print(f"[Register] Step 10: Registering {len(handler_pairs)} application handlers...")
@@ -5763,7 +6346,7 @@ def register():
 def unregister():
     global custom_icons
     global thumbnail_monitor_timer_active, thumbnail_worker_pool, thumbnail_task_queue
-    global thumbnail_pending_on_disk_check, thumbnail_generation_scheduled
+    global thumbnail_pending_on_disk_check
     global db_connections
     global material_names, material_hashes, global_hash_cache, material_list_cache, _display_name_cache
     # New batch and async globals
@@ -5779,6 +6362,13 @@ def unregister():
     g_material_processing_timer_active = False
     print("[Unregister] Stopped material processing timer.")
 
+    flush_material_names_now() # Before the DB pool is closed below
+
+    if bpy.app.timers.is_registered(_reap_background_pack_workers):
+        bpy.app.timers.unregister(_reap_background_pack_workers) # Workers keep running; only the watcher stops
+    if bpy.app.timers.is_registered(_switch_to_editing_mode):
+        bpy.app.timers.unregister(_switch_to_editing_mode)
+
     cleanup_hashing_scene_bundle()
     print("[Unregister] Hashing scene bundle cleaned up.")
     
@@ -5803,8 +6393,6 @@ def unregister():
             # Process is still running
             try:
                 pid = getattr(process, 'pid', 'Unknown')
-                print(f"  Worker {worker_idx + 1}: Pausing 0.1s before killing running process (PID: {pid})...")
-                time.sleep(0.1)
                 process.kill()
                 print(f"  Worker {worker_idx + 1}: Kill signal sent for PID: {pid}.")
             except Exception as e_kill_general:
@@ -5865,6 +6453,8 @@ def unregister():
         except Exception as e_preview_rem:
             print(f"[Unregister] Error removing custom_icons preview collection: {e_preview_rem}")
         custom_icons = None
+    _known_good_icons.clear()
+    _thumb_mtime_cache.clear()
 
     if 'db_connections' in globals() and isinstance(db_connections, Queue):
         closed_count = 0
@@ -5885,9 +6475,9 @@ def unregister():
     material_names.clear()
     material_hashes.clear()
     global_hash_cache.clear()
+    _icon_hash_cache.clear()
     material_list_cache.clear()
     _display_name_cache.clear()
-    thumbnail_generation_scheduled.clear()
     g_tasks_for_current_run.clear()
     g_current_run_task_hashes_being_processed.clear()
 
@@ -152,7 +152,7 @@ def _hash_image(img, image_hash_cache):
 
     if calculated_digest is None and hasattr(img, 'filepath_raw') and img.filepath_raw:
         try:
-            resolved_abs_path = bpy.path.abspath(img.filepath_raw)
+            resolved_abs_path = bpy.path.abspath(img.filepath_raw, library=img.library) # '//' is relative to the owning .blend
             if os.path.isfile(resolved_abs_path):
                 with open(resolved_abs_path, "rb") as f:
                     data_from_file = f.read(131072)
@@ -161,7 +161,7 @@ def _hash_image(img, image_hash_cache):
             print(f"[_hash_image Warning] Hash failed on file '{img.filepath_raw}': {e_file}", file=sys.stderr)
 
     if calculated_digest is None:
-        fallback_data = f"FALLBACK|{getattr(img, 'name_full', 'N/A')}|{getattr(img, 'source', 'N/A')}"
+        fallback_data = f"FALLBACK|{getattr(img, 'name', 'N/A')}|{getattr(img, 'source', 'N/A')}" # name, not name_full: same digest linked or appended
         calculated_digest = hashlib.md5(fallback_data.encode('utf-8')).hexdigest()
 
     if image_hash_cache is not None: